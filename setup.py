@@ -38,11 +38,14 @@ setup (
         'Natural Language :: English',
         'Operating System :: OS Independent',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
         'Programming Language :: Python :: Implementation :: CPython',
         'Programming Language :: Python :: Implementation :: PyPy',
         'Topic :: Software Development :: Libraries :: Python Modules',
@@ -53,8 +56,11 @@ setup (
     include_package_data = True,
     package_dir = {'':'src'},
     namespace_packages = ['z3c'],
+    python_requires = '>=3.7',
     extras_require = dict(
         test = ['zope.testing'],
+        numpy = ['numpy'],
+        export = ['pyarrow', 'zstandard'],
         ),
     install_requires = [
         'random2',
@@ -62,6 +68,12 @@ setup (
         'zope.interface',
         'zope.schema',
         ],
+    entry_points = {
+        'console_scripts': [
+            'z3c-datagen = z3c.datagenerator.cli:main',
+            'z3c-datacompile = z3c.datagenerator.data:main',
+            ],
+        },
     zip_safe = False,
     tests_require = ['zope.testing'],
     test_suite = 'z3c.datagenerator.tests.test_suite',
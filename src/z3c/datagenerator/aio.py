@@ -0,0 +1,117 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Asynchronous Data Generation
+
+Values are computed chunk by chunk. Between chunks, control is returned to
+the event loop, or every chunk is computed by an executor, so that the loop
+is never blocked longer than a single chunk takes. This module requires
+Python 3.7 or later; the generators import it lazily.
+"""
+__docformat__ = "reStructuredText"
+import asyncio
+
+from z3c.datagenerator import generator
+
+# The default maximum amount of chunks waiting in the queue of a pipeline.
+MAXSIZE = 4
+
+
+async def iterChunks(gen, number=None, chunksize=None, executor=None):
+    """Iterate asynchronously over the chunks of values of the generator.
+
+    The chunks are identical to the ones of ``generator.iterMany()``, so
+    that sample generators select with replacement. If ``executor`` is given,
+    or is ``True`` for the default executor of the loop, the chunks are
+    computed by the executor.
+    """
+    chunks = generator.iterMany(gen, number, chunksize or gen.chunksize)
+    if executor is None:
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(0)
+        return
+    loop = asyncio.get_running_loop()
+    if executor is True:
+        executor = None
+    while True:
+        chunk = await loop.run_in_executor(executor, next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def iterMany(gen, number=None, chunksize=None, executor=None):
+    """Iterate asynchronously over the values of the generator."""
+    async for chunk in iterChunks(gen, number, chunksize, executor):
+        for value in chunk:
+            yield value
+
+
+async def getMany(gen, number, chunksize=None, executor=None):
+    """Compute ``number`` values without blocking the event loop."""
+    values = []
+    async for chunk in iterChunks(gen, number, chunksize, executor):
+        values.extend(chunk)
+    return values
+
+
+async def produce(gen, queue, number, chunksize=None, executor=None):
+    """Put the chunks of values into the queue, followed by ``None``.
+
+    With a bounded queue, the production waits for the consumers.
+    """
+    async for chunk in iterChunks(gen, number, chunksize, executor):
+        await queue.put(chunk)
+    await queue.put(None)
+
+
+async def pipeline(gen, consumer, number, chunksize=None, maxsize=MAXSIZE,
+                   executor=None):
+    """Feed ``number`` values to the consumer chunk by chunk.
+
+    ``consumer`` is a coroutine function called with every chunk, for
+    example to insert the rows into a database. The generation of the next
+    chunks overlaps with the consumption, but at most ``maxsize`` chunks are
+    waiting. Returns the number of consumed values. Errors of the
+    generation are raised after the chunks computed before were consumed.
+    """
+    queue = asyncio.Queue(maxsize)
+    producer = asyncio.ensure_future(
+        produce(gen, queue, number, chunksize, executor))
+    consumed = 0
+    try:
+        while True:
+            if producer.done():
+                # Raise the error of the producer, if any.
+                producer.result()
+                chunk = await queue.get()
+            else:
+                # Wait for the producer as well, which never puts the final
+                # ``None`` if the generation fails.
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait(
+                    (getter, producer), return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                chunk = getter.result()
+            if chunk is None:
+                break
+            await consumer(chunk)
+            consumed += len(chunk)
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+    return consumed
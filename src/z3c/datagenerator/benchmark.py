@@ -0,0 +1,176 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Data Generator Benchmarks
+
+Run ``python -m z3c.datagenerator.benchmark --output results.json`` to
+measure all generators and save the results for comparison between releases.
+"""
+__docformat__ = "reStructuredText"
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+import zope.schema.vocabulary
+
+from z3c.datagenerator import (
+    data, demographics, generator, net, record, text)
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    from importlib import metadata
+except ImportError:
+    metadata = None
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+# The benchmarked generators: name -> factory called with the seed.
+GENERATORS = [
+    ('vocabulary', lambda seed: generator.VocabularyDataGenerator(
+        seed, zope.schema.vocabulary.SimpleVocabulary.fromValues(
+            range(1000)))),
+    ('text', lambda seed: generator.TextDataGenerator(seed, 'words.txt')),
+    ('csv', lambda seed: generator.CSVDataGenerator(seed, 'ccTLD.csv')),
+    ('date', generator.DateDataGenerator),
+    ('id', generator.IdDataGenerator),
+    ('firstName', demographics.FirstNameGenerator),
+    ('lastName', demographics.LastNameGenerator),
+    ('ssn', demographics.SSNDataGenerator),
+    ('address', demographics.AddressDataGenerator),
+    ('phone', demographics.PhoneDataGenerator),
+    ('ip', net.IPv4DataGenerator),
+    ('username', net.UsernameDataGenerator),
+    ('email', net.EMailDataGenerator),
+    ('record', record.RecordGenerator),
+    ('paragraph', lambda seed: text.TextGenerator(seed, unit='paragraph')),
+    ]
+
+SIZES = (1, 100, 10000, 100000)
+
+
+def _timeit(func, repeat):
+    """Return the best time of ``repeat`` calls of ``func``."""
+    best = None
+    for count in range(repeat):
+        start = _clock()
+        func()
+        seconds = _clock() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def _peakMemory(func):
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmarkGenerator(factory, sizes=SIZES, repeat=3, calls=1000):
+    """Measure a single generator.
+
+    Returns a dictionary with the construction time with and without loaded
+    data files, the latency of ``get()``, the throughput of ``getMany()`` for
+    all sizes and the peak memory used by ``getMany()`` of the largest size.
+    """
+    def construct():
+        data.cache.invalidate()
+        factory('seed').get()
+    result = {
+        'construct_cold_s': _timeit(construct, repeat),
+        'construct_warm_s': _timeit(lambda: factory('seed').get(), repeat),
+        }
+    gen = factory('seed')
+    gen.get()
+    def get():
+        for count in range(calls):
+            gen.get()
+    result['get_latency_s'] = _timeit(get, repeat) / calls
+    throughput = {}
+    for size in sizes:
+        seconds = _timeit(lambda: generator.getMany(gen, size), repeat)
+        throughput[str(size)] = size / seconds if seconds else None
+    result['getMany_values_per_s'] = throughput
+    result['getMany_peak_memory_bytes'] = _peakMemory(
+        lambda: generator.getMany(gen, max(sizes)))
+    return result
+
+
+def run(generators=GENERATORS, sizes=SIZES, repeat=3, calls=1000):
+    """Run the benchmarks and return the results as a dictionary."""
+    version = None
+    if metadata is not None:
+        try:
+            version = metadata.version('z3c.datagenerator')
+        except metadata.PackageNotFoundError:
+            pass
+    results = {}
+    for name, factory in generators:
+        results[name] = benchmarkGenerator(factory, sizes, repeat, calls)
+    return {
+        'package_version': version,
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'sizes': list(sizes),
+        'results': results,
+        }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the z3c.datagenerator generators.')
+    parser.add_argument(
+        '-o', '--output', default='-',
+        help='the JSON results file; "-" writes to stdout (default)')
+    parser.add_argument(
+        '--sizes', default=','.join(str(size) for size in SIZES),
+        help='comma-separated getMany() sizes (default: %(default)s)')
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='the number of repetitions of each measurement')
+    parser.add_argument(
+        '--only', default=None,
+        help='comma-separated names of the generators to benchmark')
+    options = parser.parse_args(args)
+    generators = GENERATORS
+    if options.only:
+        names = options.only.split(',')
+        generators = [(name, factory) for name, factory in GENERATORS
+                      if name in names]
+    results = run(
+        generators, [int(size) for size in options.sizes.split(',')],
+        options.repeat)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if options.output == '-':
+        sys.stdout.write(output + '\n')
+    else:
+        with open(options.output, 'w') as file:
+            file.write(output + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Command Line Data Generation"""
+__docformat__ = "reStructuredText"
+import argparse
+import functools
+import sys
+
+from z3c.datagenerator import export, generator, parallel, record
+
+# Field names accepted on the command line -> record field names.
+FIELDS = {
+    'firstname': 'firstName',
+    'lastname': 'lastName',
+    'ssn': 'ssn',
+    'address': 'address',
+    'phone': 'phone',
+    'ip': 'ip',
+    'ipv6': 'ipv6',
+    'mac': 'mac',
+    'url': 'url',
+    'username': 'username',
+    'email': 'email',
+    'date': 'date',
+    'id': 'id',
+    'text': 'text',
+    }
+
+
+def fieldList(value):
+    fields = [name.strip().lower() for name in value.split(',')]
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            'unknown field(s): %s (choose from %s)' % (
+                ', '.join(unknown), ', '.join(sorted(FIELDS))))
+    return [FIELDS[name] for name in fields]
+
+
+def recordGenerator(seed, fields, rng, locale=None):
+    """Create the record generator of a shard."""
+    gen = record.RecordGenerator(
+        seed, fields, rowFactory=tuple, locale=locale)
+    return gen.useRNG(rng)
+
+
+def getParser():
+    parser = argparse.ArgumentParser(
+        prog='z3c-datagen',
+        description='Generate large sample data sets.')
+    parser.add_argument(
+        '-s', '--seed', default='seed',
+        help='the seed of the data set (default: %(default)s)')
+    parser.add_argument(
+        '-n', '--rows', type=int, required=True,
+        help='the number of rows to generate')
+    parser.add_argument(
+        '-f', '--fields', type=fieldList,
+        default=list(record.PERSON_FIELDS),
+        help='comma-separated fields: %s' % ', '.join(sorted(FIELDS)))
+    parser.add_argument(
+        '-F', '--format', choices=sorted(export.EXPORTERS), default='csv',
+        help='the output format (default: %(default)s)')
+    parser.add_argument(
+        '-o', '--output', default='-',
+        help='the output file; "-" writes to stdout (default)')
+    parser.add_argument(
+        '-z', '--compression', choices=['gzip', 'zstd'],
+        help='compress the output')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=1,
+        help='the number of worker processes (default: %(default)s)')
+    parser.add_argument(
+        '--shardsize', type=int, default=parallel.SHARDSIZE,
+        help='the number of rows per shard (default: %(default)s); the '
+             'output only depends on the seed and the shard size')
+    parser.add_argument(
+        '--rng', choices=sorted(generator.RNGS), default=generator.LEGACY,
+        help='the random number generator backend (default: %(default)s)')
+    parser.add_argument(
+        '--locale', default=None,
+        help='the locale pack of names, addresses, phone numbers and SSNs, '
+             'for example de_DE (default: en_US)')
+    parser.add_argument(
+        '--progress', action='store_true',
+        help='report the throughput on stderr')
+    return parser
+
+
+def reportProgress(stats, stream=sys.stderr):
+    stream.write('\r%i rows, %i bytes, %.0f rows/s, %.0f bytes/s' % (
+        stats.rows, stats.bytes, stats.rowsPerSecond, stats.bytesPerSecond))
+    stream.flush()
+
+
+def main(args=None):
+    options = getParser().parse_args(args)
+    factory = functools.partial(
+        recordGenerator, fields=options.fields, rng=options.rng,
+        locale=options.locale)
+    output = options.output
+    if output == '-':
+        output = getattr(sys.stdout, 'buffer', sys.stdout)
+    try:
+        # Creating the generators validates the options, like the locale.
+        source = parallel.ParallelDataGenerator(
+            factory, options.seed, options.workers, options.shardsize)
+        stats = export.export(
+            source, options.rows, output, options.format,
+            progress=reportProgress if options.progress else None,
+            compression=options.compression)
+    except ValueError as err:
+        sys.stderr.write('z3c-datagen: error: %s\n' % err)
+        return 2
+    if options.progress:
+        reportProgress(stats)
+        sys.stderr.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
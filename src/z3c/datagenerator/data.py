@@ -0,0 +1,463 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Data File Loading and Caching"""
+__docformat__ = "reStructuredText"
+import argparse
+import array
+import csv
+import io
+import mmap
+import os
+import struct
+import sys
+import threading
+from zlib import crc32
+
+# Separates the fields of CSV rows in compact sequences.
+SEPARATOR = u'\x1f'
+# Terminate the values of compact sequences of text lines and CSV rows.
+TERMINATORS = {None: u'\n', SEPARATOR: u'\x1e'}
+
+
+class CompactSequence(object):
+    """An immutable sequence of strings stored in a single buffer.
+
+    The UTF-8 encoded values are concatenated in one bytes-like buffer, each
+    followed by a terminator, and located using an array of offsets, so that
+    only two objects are stored regardless of the number of values. Values
+    are decoded when accessed. If ``separator`` is given, every value is a
+    row, which is split into a tuple of fields.
+
+    Since the reference counts of the values are never touched, the memory
+    pages of the buffer remain shared between forked processes.
+    """
+
+    weights = None
+    weightColumn = None
+
+    def __init__(self, buffer, offsets, separator=None, weights=None):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.separator = separator
+        self.weights = weights
+
+    @classmethod
+    def fromValues(cls, values, separator=None):
+        """Create a compact sequence from an iterable of strings or rows."""
+        terminator = TERMINATORS[separator]
+        buffer = bytearray()
+        offsets = array.array('Q', [0])
+        for value in values:
+            if separator is not None:
+                value = separator.join(value)
+            if terminator in value:
+                raise ValueError('Values must not contain %r.' % terminator)
+            buffer += (value + terminator).encode('utf-8')
+            offsets.append(len(buffer))
+        if len(buffer) < 1 << 32:
+            offsets = array.array('I', offsets)
+        return cls(bytes(buffer), offsets, separator)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[pos] for pos in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('sequence index out of range')
+        offsets = self.offsets
+        value = self.buffer[offsets[idx]:offsets[idx + 1] - 1]
+        if not isinstance(value, bytes):
+            value = bytes(value)
+        value = value.decode('utf-8')
+        if self.separator is not None:
+            return tuple(value.split(self.separator)) if value else ()
+        return value
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __sizeof__(self):
+        return (object.__sizeof__(self) + sys.getsizeof(self.buffer) +
+                sys.getsizeof(self.offsets))
+
+    def materialize(self):
+        """Return all values as a tuple, decoding the buffer at once."""
+        values = bytes(self.buffer).decode('utf-8').split(
+            TERMINATORS[self.separator])[:-1]
+        if self.separator is None:
+            return tuple(values)
+        separator = self.separator
+        return tuple(tuple(value.split(separator)) if value else ()
+                     for value in values)
+
+
+# Compiled data files: the magic, format version, kind of values (0 = text,
+# 1 = rows), byte order (0 = little, 1 = big), size of the offsets, column
+# of the weights (255 = none), the number of values, the size of the
+# buffer, the size and CRC-32 of the source file and its encoding, followed
+# by the offsets, the buffer and, aligned to 8 bytes, the weights.
+COMPILED_SUFFIX = '.zdg'
+_MAGIC = b'ZDGC'
+_VERSION = 1
+_HEADER = struct.Struct('<4sBBBBBxxxQQQI16s')
+_KINDS = {'text': 0, 'rows': 1}
+_NO_WEIGHTS = 255
+
+
+def _sourceInfo(path):
+    with io.open(path, 'rb') as file:
+        content = file.read()
+    return len(content), crc32(content) & 0xffffffff
+
+
+def compileFile(path, encoding='latin-1', format='text', weightColumn=None,
+                output=None):
+    """Compile a text or `;`-delimited CSV file into the binary format.
+
+    The compiled file is stored next to the source, unless ``output`` is
+    given. With a ``weightColumn``, the weights of the CSV rows are stored
+    as well. Returns the path of the compiled file.
+    """
+    if format not in ('text', 'csv'):
+        raise ValueError('Unknown format: %r' % format)
+    if weightColumn is not None and format != 'csv':
+        raise ValueError('Weights require the csv format.')
+    if format == 'text':
+        values = readCompactText(path, encoding)
+    else:
+        values = readCompactCSV(path, encoding)
+    weights = None
+    if weightColumn is not None:
+        weights = array.array(
+            'd', [float(row[weightColumn]) if len(row) > weightColumn
+                  else 1.0 for row in values])
+    size, checksum = _sourceInfo(path)
+    header = _HEADER.pack(
+        _MAGIC, _VERSION, _KINDS['rows' if format == 'csv' else 'text'],
+        0 if sys.byteorder == 'little' else 1, values.offsets.itemsize,
+        _NO_WEIGHTS if weightColumn is None else weightColumn,
+        len(values), len(values.buffer), size, checksum,
+        encoding.encode('ascii'))
+    output = output or path + COMPILED_SUFFIX
+    with io.open(output, 'wb') as file:
+        file.write(header)
+        file.write(values.offsets.tobytes())
+        file.write(values.buffer)
+        if weights is not None:
+            file.write(b'\0' * (-file.tell() % 8))
+            file.write(weights.tobytes())
+    return output
+
+
+def readCompiled(path, kind, encoding='latin-1'):
+    """Map the compiled form of the file into a compact sequence.
+
+    Returns ``None``, if there is no compiled file of the kind (``text`` or
+    ``rows``), or if it does not match the source file.
+    """
+    compiled = path + COMPILED_SUFFIX
+    if not os.path.exists(compiled):
+        return None
+    with io.open(compiled, 'rb') as file:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return None
+        (magic, version, kindId, order, itemsize, weightColumn, count,
+         length, size, checksum, sourceEncoding) = _HEADER.unpack(header)
+        if (magic != _MAGIC or version != _VERSION or
+                kindId != _KINDS[kind] or
+                order != (0 if sys.byteorder == 'little' else 1) or
+                sourceEncoding.rstrip(b'\0').decode('ascii') != encoding):
+            return None
+        if os.path.exists(path) and _sourceInfo(path) != (size, checksum):
+            return None
+        content = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(content)
+    start = _HEADER.size
+    offsets = view[start:start + (count + 1) * itemsize].cast(
+        'I' if itemsize == 4 else 'Q')
+    start += (count + 1) * itemsize
+    buffer = view[start:start + length]
+    values = CompactSequence(
+        buffer, offsets, SEPARATOR if kind == 'rows' else None)
+    if weightColumn != _NO_WEIGHTS:
+        start += length
+        start += -start % 8
+        values.weights = view[start:start + count * 8].cast('d')
+        values.weightColumn = weightColumn
+    return values
+
+
+def readText(fullpath, encoding):
+    """Read a file and return a tuple of its stripped lines."""
+    with io.open(fullpath, 'r', encoding=encoding) as file:
+        return tuple(e.strip() for e in file.readlines())
+
+
+def readCSV(fullpath, encoding):
+    """Read a `;`-delimited CSV file and return a tuple of row tuples."""
+    with io.open(fullpath, 'r', encoding=encoding) as file:
+        reader = csv.reader(file, delimiter=';')
+        return tuple(tuple(row) for row in reader)
+
+
+def readCompactText(fullpath, encoding):
+    """Read a file into a compact sequence of its stripped lines."""
+    with io.open(fullpath, 'r', encoding=encoding) as file:
+        return CompactSequence.fromValues(line.strip() for line in file)
+
+
+def readCompactCSV(fullpath, encoding):
+    """Read a `;`-delimited CSV file into a compact sequence of rows."""
+    with io.open(fullpath, 'r', encoding=encoding) as file:
+        return CompactSequence.fromValues(
+            csv.reader(file, delimiter=';'), SEPARATOR)
+
+
+READERS = {
+    'text': readText,
+    'csv': readCSV,
+    'compact-text': readCompactText,
+    'compact-csv': readCompactCSV,
+    }
+
+# The kind of compiled files used for each format.
+COMPILED = {
+    'text': 'text',
+    'csv': 'rows',
+    'compact-text': 'text',
+    'compact-csv': 'rows',
+    }
+
+
+def read(fullpath, encoding, format):
+    """Read the file, preferring its compiled form if available."""
+    if format in COMPILED:
+        values = readCompiled(fullpath, COMPILED[format], encoding)
+        if values is not None:
+            if not format.startswith('compact-'):
+                values = values.materialize()
+            return values
+    return READERS[format](fullpath, encoding)
+
+
+class AliasTable(object):
+    """Walker's alias table selecting indexes proportionally to weights.
+
+    The table is computed once in O(n); afterwards every selection takes
+    O(1) and consumes exactly one random number.
+    """
+
+    def __init__(self, weights):
+        size = len(weights)
+        total = float(sum(weights))
+        if not size or total <= 0 or min(weights) < 0:
+            raise ValueError('The weights must be positive.')
+        scaled = [weight * size / total for weight in weights]
+        prob = [1.0] * size
+        alias = list(range(size))
+        small = [idx for idx, value in enumerate(scaled) if value < 1.0]
+        large = [idx for idx, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        self.prob = tuple(prob)
+        self.alias = tuple(alias)
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self, random):
+        """Select an index using the ``random()`` function."""
+        value = random() * len(self.prob)
+        idx = int(value)
+        return idx if value - idx < self.prob[idx] else self.alias[idx]
+
+    def drawMany(self, random, number):
+        """Select ``number`` indexes using the ``random()`` function."""
+        prob, alias = self.prob, self.alias
+        size = len(prob)
+        result = []
+        append = result.append
+        for count in range(number):
+            value = random() * size
+            idx = int(value)
+            append(idx if value - idx < prob[idx] else alias[idx])
+        return result
+
+
+def _sizeof(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(_sizeof(item) for item in value)
+    return size
+
+
+class DataFileCache(object):
+    """A process-wide cache of parsed data files.
+
+    Each file is parsed at most once per resolved path, encoding and format;
+    all generators share the resulting immutable tuple.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def _key(self, path, encoding, format):
+        return os.path.realpath(path), encoding, format
+
+    def load(self, path, encoding='latin-1', format='text'):
+        """Return the parsed contents of the file, loading it if necessary."""
+        key = self._key(path, encoding, format)
+        try:
+            return self._data[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = read(key[0], encoding, format)
+            return self._data[key]
+
+    def derive(self, path, name, factory, encoding='latin-1', format='text'):
+        """Return data computed from the parsed contents of the file.
+
+        ``factory`` is called with the parsed contents at most once per file
+        and ``name``, so that the result, like an alias table, is shared by
+        all generators.
+        """
+        key = self._key(path, encoding, format) + (name,)
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        value = factory(self.load(path, encoding, format))
+        with self._lock:
+            return self._derived.setdefault(key, value)
+
+    def __contains__(self, path):
+        path = os.path.realpath(path)
+        return any(key[0] == path for key in self._data)
+
+    def invalidate(self, path=None):
+        """Forget the cached contents of the given file or of all files."""
+        with self._lock:
+            if path is None:
+                self._data.clear()
+                self._derived.clear()
+                return
+            path = os.path.realpath(path)
+            for mapping in (self._data, self._derived):
+                for key in [key for key in mapping if key[0] == path]:
+                    del mapping[key]
+
+    def info(self):
+        """Return a list of descriptions of all cached files."""
+        return [{'path': key[0],
+                 'encoding': key[1],
+                 'format': key[2],
+                 'entries': len(value),
+                 'size': _sizeof(value)}
+                for key, value in sorted(self._data.items())]
+
+    def memoryUsage(self):
+        """Return the approximate memory used by the cached data in bytes."""
+        return sum(_sizeof(value) for value in list(self._data.values()))
+
+
+cache = DataFileCache()
+
+
+class cachedFile(object):
+    """Descriptor providing the lazily loaded contents of a data file.
+
+    The filename is looked up on the instance using ``fileAttribute``, so
+    that subclasses can simply override it. The instance must also provide
+    the ``path`` and ``encoding`` attributes.
+    """
+
+    def __init__(self, name, fileAttribute, format='text'):
+        self.name = name
+        self.fileAttribute = fileAttribute
+        self.format = format
+
+    def __get__(self, inst, cls):
+        if inst is None:
+            return self
+        fullpath = os.path.join(inst.path, getattr(inst, self.fileAttribute))
+        value = cache.load(fullpath, inst.encoding, self.format)
+        inst.__dict__[self.name] = value
+        return value
+
+
+def compilePackage(directory=os.path.dirname(__file__), encoding='latin-1'):
+    """Compile all text and CSV data files of the directory."""
+    compiled = []
+    for name in sorted(os.listdir(directory)):
+        base, ext = os.path.splitext(name)
+        if ext in ('.txt', '.csv'):
+            compiled.append(compileFile(
+                os.path.join(directory, name), encoding,
+                'csv' if ext == '.csv' else 'text'))
+    return compiled
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='z3c-datacompile',
+        description='Compile data files into the binary format, which is '
+                    'loaded instead of the text files.')
+    parser.add_argument(
+        'files', nargs='*',
+        help='the data files; by default, all shipped data files')
+    parser.add_argument(
+        '-e', '--encoding', default='latin-1',
+        help='the encoding of the data files (default: %(default)s)')
+    parser.add_argument(
+        '--csv', action='store_true',
+        help='read the files as `;`-delimited CSV; implied for .csv files')
+    parser.add_argument(
+        '-w', '--weights', type=int, default=None, metavar='COLUMN',
+        help='store the weights of the given CSV column')
+    options = parser.parse_args(args)
+    if not options.files:
+        compiled = compilePackage(encoding=options.encoding)
+    else:
+        compiled = []
+        for path in options.files:
+            isCSV = options.csv or options.weights is not None or \
+                path.endswith('.csv')
+            compiled.append(compileFile(
+                path, options.encoding, 'csv' if isCSV else 'text',
+                options.weights))
+    for path in compiled:
+        sys.stdout.write(path + '\n')
+    return 0
@@ -0,0 +1,248 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Multi-Table Data Sets
+
+A data set consists of tables related by foreign keys. Child tables have a
+random number of rows per parent row. Rows are streamed in chunks; no keys
+are stored, since the key of any row is computed from its index.
+"""
+__docformat__ = "reStructuredText"
+import collections
+import os
+import zope.interface
+
+from z3c.datagenerator import export, generator, interfaces, record
+
+# The file extensions of the export formats and compressions.
+EXTENSIONS = {
+    'csv': '.csv',
+    'jsonl': '.jsonl',
+    'parquet': '.parquet',
+    'gzip': '.gz',
+    'zstd': '.zst',
+    }
+
+
+@zope.interface.implementer(interfaces.ITable)
+class Table(object):
+    """A table of a data set.
+
+    Every row starts with its key, which is the row number starting at 1,
+    or, given a ``keyGenerator``, the value of its counter-based stream at
+    the row index. Use a generator in unique mode, like
+    ``IdDataGenerator(seed, unique=True)``, for distinct keys.
+
+    Child tables have a ``parent`` table. The number of rows per parent row
+    is drawn from ``fanout``, a ``(low, high)`` tuple of uniformly
+    distributed counts or a callable computing a count from the ``random()``
+    function. The ``foreignKey`` column holds the key of the parent row.
+
+    ``references`` maps column names to tables, of which a random row is
+    referenced, for example the product of an order item. Finally, the
+    ``fields`` are the fields of a record generator.
+    """
+
+    chunksize = 1000
+
+    def __init__(self, dataset, name, fields=(), rows=None, parent=None,
+                 fanout=(1, 5), foreignKey=None, references=None, key='id',
+                 keyGenerator=None):
+        if (rows is None) == (parent is None):
+            raise ValueError(
+                'Either the number of rows or the parent is required.')
+        self.dataset = dataset
+        self.name = name
+        self.seed = '%s:%s' % (dataset.seed, name)
+        self.fields = tuple(fields)
+        self.rows = rows
+        self.parent = parent
+        self.fanout = fanout
+        self.foreignKey = foreignKey
+        if parent is not None and foreignKey is None:
+            self.foreignKey = '%s_%s' % (parent, dataset[parent].key)
+        self.references = collections.OrderedDict(
+            sorted((references or {}).items()))
+        self.key = key
+        self.keyGenerator = keyGenerator
+        self._count = rows
+
+    @property
+    def names(self):
+        """The names of the columns."""
+        names = [self.key]
+        if self.parent is not None:
+            names.append(self.foreignKey)
+        names.extend(self.references)
+        if self.fields:
+            names.extend(record.RecordGenerator(
+                self.seed, self.fields, rowFactory=tuple).names)
+        return names
+
+    @property
+    def depends(self):
+        """The names of the tables this table refers to."""
+        names = list(self.references.values())
+        if self.parent is not None:
+            names.insert(0, self.parent)
+        return names
+
+    def _random(self, name):
+        return generator.RNGS[generator.RNG](
+            generator.consistent_hash(self.seed + name))
+
+    def _fanout(self, rnd):
+        if callable(self.fanout):
+            return self.fanout(rnd)
+        low, high = self.fanout
+        return low + int(rnd() * (high - low + 1))
+
+    def count(self):
+        """Return the number of rows.
+
+        The number of rows of child tables is computed by drawing the fan-out
+        of all parent rows once.
+        """
+        if self._count is None:
+            rnd = self._random('fanout').random
+            fanout = self._fanout
+            self._count = sum(fanout(rnd) for count in range(
+                self.dataset[self.parent].count()))
+        return self._count
+
+    def keyAt(self, index):
+        """Compute the key of the row at the index."""
+        if self.keyGenerator is None:
+            return index + 1
+        return self.keyGenerator.getAt(index)
+
+    def keys(self, start, stop):
+        """Compute the keys of the rows from ``start`` to ``stop``."""
+        if self.keyGenerator is None:
+            return list(range(start + 1, stop + 1))
+        return self.keyGenerator.getRange(start, stop)
+
+    def _parentIndexes(self):
+        # Iterate over the index of the parent row of every row.
+        rnd = self._random('fanout').random
+        fanout = self._fanout
+        for idx in range(self.dataset[self.parent].count()):
+            for count in range(fanout(rnd)):
+                yield idx
+
+    def iterMany(self, number=None, chunksize=None):
+        """Iterate over the rows, optionally in chunks of rows."""
+        total = self.count()
+        if number is None or number > total:
+            number = total
+        size = chunksize or self.chunksize
+        chunks = self._chunks(number, size)
+        if chunksize:
+            return chunks
+        return (row for chunk in chunks for row in chunk)
+
+    def __iter__(self):
+        return self.iterMany()
+
+    def _chunks(self, number, size):
+        parents = None
+        if self.parent is not None:
+            parents = self._parentIndexes()
+            parent = self.dataset[self.parent]
+        rnd = self._random('references').random
+        references = [(self.dataset[name], self.dataset[name].count())
+                      for name in self.references.values()]
+        records = None
+        if self.fields:
+            records = record.RecordGenerator(
+                self.seed, self.fields, rowFactory=tuple)
+        for start in range(0, number, size):
+            stop = min(start + size, number)
+            columns = [self.keys(start, stop)]
+            if parents is not None:
+                keyAt = parent.keyAt
+                columns.append([keyAt(next(parents))
+                                for idx in range(start, stop)])
+            for table, count in references:
+                keyAt = table.keyAt
+                columns.append([keyAt(int(rnd() * count))
+                                for idx in range(start, stop)])
+            rows = list(zip(*columns))
+            if records is not None:
+                rows = [row + values for row, values in
+                        zip(rows, records.getMany(stop - start))]
+            yield rows
+
+
+@zope.interface.implementer(interfaces.IDataset)
+class Dataset(object):
+    """A set of related tables.
+
+    Each table is seeded with the seed of the data set and its name, so that
+    adding tables does not change the rows of others.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.tables = collections.OrderedDict()
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+    def addTable(self, name, fields=(), rows=None, **kw):
+        """Add a table; see ``Table`` for the arguments."""
+        if name in self.tables:
+            raise ValueError('Duplicate table: %r' % name)
+        parent = kw.get('parent')
+        if parent is not None and parent not in self.tables:
+            raise ValueError('Unknown table: %r' % parent)
+        table = Table(self, name, fields, rows, **kw)
+        for dependency in table.depends:
+            if dependency not in self.tables:
+                raise ValueError('Unknown table: %r' % dependency)
+        self.tables[name] = table
+        return table
+
+    def order(self):
+        """Return the tables in dependency order."""
+        ordered = []
+        def visit(table):
+            if table in ordered:
+                return
+            for name in table.depends:
+                visit(self.tables[name])
+            ordered.append(table)
+        for table in self.tables.values():
+            visit(table)
+        return ordered
+
+    def export(self, directory, format='csv', compression=None, **kw):
+        """Export all tables in dependency order into the directory.
+
+        Every table is written to a file named after the table. Returns the
+        statistics of every table.
+        """
+        try:
+            factory = export.EXPORTERS[format]
+        except KeyError:
+            raise ValueError('Unknown format: %r' % format)
+        filename = '%s' + EXTENSIONS[format]
+        if compression is not None and format != 'parquet':
+            filename += EXTENSIONS[compression]
+        statistics = collections.OrderedDict()
+        for table in self.order():
+            exporter = factory(compression=compression, **kw)
+            statistics[table.name] = exporter.export(
+                table, table.count(),
+                os.path.join(directory, filename % table.name))
+        return statistics
@@ -13,115 +13,470 @@
 ##############################################################################
 """Demographics Data Generators"""
 __docformat__ = "reStructuredText"
-import io
+import array
 import os
-import random2 as random
 import zope.interface
 
-from z3c.datagenerator import generator
+from z3c.datagenerator import data, generator, locales
+
+
+def useLocale(gen, locale):
+    """Read the data files of the generator from the locale pack."""
+    locale = locales.getLocale(locale)
+    gen.locale = locale
+    gen.path = locale.path
+    gen.encoding = locale.encoding
+    return locale
+
+
+def _components(rules):
+    return tuple(tuple(component) for component in rules['components'])
+
+
+def _draw(rnd, components):
+    # Like ``randint()`` for every component; fixed components are not drawn.
+    return tuple(low if low == high else low + int(rnd() * (high - low + 1))
+                 for low, high in components)
+
 
 class LastNameGenerator(generator.TextDataGenerator):
     """Last Name Generator"""
 
-    def __init__(self, seed):
-        super(LastNameGenerator, self).__init__(seed, 'lastnames.txt')
+    locale = None
+
+    def __init__(self, seed, weights=None, locale=None):
+        filename = 'lastnames.txt'
+        if locale is not None:
+            filename = useLocale(self, locale).filename('lastNames')
+        super(LastNameGenerator, self).__init__(seed, filename, weights)
 
 
 class FirstNameGenerator(generator.TextDataGenerator):
     """First Name Generator"""
 
-    def __init__(self, seed):
-        super(FirstNameGenerator, self).__init__(seed, 'firstnames.txt')
+    locale = None
+
+    def __init__(self, seed, weights=None, locale=None):
+        filename = 'firstnames.txt'
+        if locale is not None:
+            filename = useLocale(self, locale).filename('firstNames')
+        super(FirstNameGenerator, self).__init__(seed, filename, weights)
 
 
-class SSNDataGenerator(object):
-    """A social security data generator."""
+class SSNDataGenerator(generator.UniqueMixin,
+                       generator.VectorizedMixin,
+                       generator.DataGenerator):
+    """A social security data generator.
 
-    def __init__(self, seed):
-        self.random = random.Random(generator.consistent_hash(seed+'ssn'))
+    In unique mode, all numbers are distinct. With a ``locale``, the
+    national identification numbers of the locale pack are computed.
+    """
+
+    template = u'%.3i-%.2i-%.4i'
+    components = ((1, 999), (1, 99), (1, 9999))
+    locale = None
+
+    def __init__(self, seed, backend=None, unique=False, locale=None):
+        self._initRandom(seed+'ssn')
+        self.backend = generator.checkBackend(backend)
+        self.unique = unique
+        if locale is not None:
+            self.locale = locale = locales.getLocale(locale)
+            rules = locale.rule('ssn', ('template', 'components'))
+            self.template = rules['template']
+            self.components = _components(rules)
+
+    def _isDefault(self):
+        return (self.template == SSNDataGenerator.template and
+                self.components == SSNDataGenerator.components)
 
     def get(self):
         """Compute a social security number."""
+        if self.unique:
+            return self.getMany(1)[0]
         randint = self.random.randint
+        if not self._isDefault():
+            return self.template % tuple(
+                low if low == high else randint(low, high)
+                for low, high in self.components)
         return u'%.3i-%.2i-%.4i' %(
             randint(1, 999), randint(1, 99), randint(1, 9999))
 
+    def getRange(self, start, stop):
+        if self.unique:
+            self._checkSpace(start, stop - start)
+            template = self.template
+            return [template % values
+                    for values in self._rangeUnique(start, stop)]
+        return super(SSNDataGenerator, self).getRange(start, stop)
+
     def getMany(self, number):
         """Select a set of values from the values list and return them."""
-        return [self.get() for count in range(number)]
+        if self.unique:
+            template = self.template
+            return [template % values for values in self._drawUnique(number)]
+        if not self._isDefault():
+            rnd = self.random.random
+            template = self.template
+            components = self.components
+            return [template % _draw(rnd, components)
+                    for count in range(number)]
+        if self._useNumPy():
+            values = self._drawIntegers(number, [1, 1, 1], [999, 99, 9999])
+            return generator.formatColumns(
+                number, (values[:, 0], 3), u'-', (values[:, 1], 2), u'-',
+                (values[:, 2], 4))
+        # Same draws as ``randint()`` without its per-call overhead.
+        rnd = self.random.random
+        return [u'%.3i-%.2i-%.4i' %(
+                    1 + int(rnd() * 999), 1 + int(rnd() * 99),
+                    1 + int(rnd() * 9999))
+                for count in range(number)]
+
+
+_BELOW_ONE = 1.0 - 2.0 ** -50
+
+
+class PlaceIndex(object):
+    """A compact index selecting the city, state and zip code of addresses.
 
+    Every place is a ``(state, city, first zip, last zip[, weight])`` row.
+    A single random number selects a place proportionally to its weight
+    using an alias table, and the remaining fraction of the number selects a
+    zip code of its range, so that they always match.
+    """
 
-class AddressDataGenerator(object):
-    """An address data generator."""
+    def __init__(self, rows, weights=None):
+        rows = [row for row in rows if row]
+        self.places = tuple((row[1], row[0]) for row in rows)
+        self.lows = array.array('i', [int(row[2]) for row in rows])
+        # Slightly below the number of zip codes, so that a fraction rounded
+        # up to one still selects the last zip code.
+        self.spans = array.array(
+            'd', [(int(row[3]) - int(row[2]) + 1) * _BELOW_ONE
+                  for row in rows])
+        if weights is None:
+            weights = [float(row[4]) if len(row) > 4 else 1.0
+                       for row in rows]
+        table = data.AliasTable(weights)
+        self.prob = table.prob
+        self.alias = table.alias
+
+    def __len__(self):
+        return len(self.places)
+
+    def draw(self, random):
+        """Select a ``(city, state, zip)`` tuple with one random number."""
+        prob = self.prob
+        value = random() * len(prob)
+        idx = int(value)
+        value -= idx
+        limit = prob[idx]
+        if value < limit:
+            value /= limit
+        else:
+            value = (value - limit) / (1.0 - limit)
+            idx = self.alias[idx]
+        city, state = self.places[idx]
+        return city, state, self.lows[idx] + int(value * self.spans[idx])
+
+    def drawMany(self, random, number):
+        """Select ``number`` ``(city, state, zip)`` tuples."""
+        draw = self.draw
+        return [draw(random) for count in range(number)]
+
+
+class AddressDataGenerator(generator.DataGenerator):
+    """An address data generator.
+
+    If given, ``cityWeights`` is a callable computing the weight of a city,
+    so that cities are selected proportionally to their weight. Like for
+    file data generators, the tables of these weights are not cached.
+
+    With a ``locale``, the data files and the formats of the locale pack are
+    used. With ``correlated`` set, or if the pack provides no cities, the
+    city, state and zip code of an address are selected together from a
+    place index of the ``places`` file of ``state;city;first zip;last
+    zip;weight`` rows, so that they match. Places are selected
+    proportionally to their weight, unless ``cityWeights`` is given. Only
+    the addresses of ``get()`` and ``getMany()`` are correlated, though:
+    ``getCity()``, ``getState()`` and ``getZip()`` each select a place of
+    their own.
+    Without a locale, ``correlated`` selects the bundled US places instead
+    of independent cities, states and zip codes.
+    """
 
     streetNamesFile = 'us-street-names.txt'
     streetPostfixFile = 'us-street-postfix.txt'
     citiesFile = 'us-cities.txt'
     statesFile = 'us-states.txt'
+    placesFile = None
+    usPlacesFile = 'us-places.csv'
     apts = True
+    cityWeights = None
+    locale = None
+    _cityTable = None
+    _placeIndex = None
+
+    # The formats used with a locale.
+    streetTemplate = u'%(number)i %(name)s %(postfix)s'
+    streetNumbers = (1, 2000)
+    apartmentTemplate = u' Apt. %i'
+    apartmentRatio = 0.3
+    apartmentNumbers = (1, 30)
+    zipTemplate = u'%.5i'
+    zipCodes = (1000, 99999)
 
-    def __init__(self, seed):
-        self.random = random.Random(generator.consistent_hash(seed+'address'))
-        path = os.path.dirname(__file__)
+    path = os.path.dirname(__file__)
+    encoding = 'latin-1'
 
-        with io.open(os.path.join(path, self.streetNamesFile), 'r',
-                  encoding='latin-1') as file:
-            self.streetNames = [e.strip() for e in file.readlines()]
+    streetNames = data.cachedFile('streetNames', 'streetNamesFile')
+    streetPostfix = data.cachedFile('streetPostfix', 'streetPostfixFile')
+    cities = data.cachedFile('cities', 'citiesFile')
+    states = data.cachedFile('states', 'statesFile')
+    places = data.cachedFile('places', 'placesFile', 'csv')
 
-        with io.open(os.path.join(path, self.streetPostfixFile), 'r',
-                     encoding='latin-1') as file:
-            self.streetPostfix = [e.strip() for e in file.readlines()]
+    def __init__(self, seed, cityWeights=None, locale=None,
+                 correlated=False):
+        self._initRandom(seed+'address')
+        self.cityWeights = cityWeights
+        if locale is not None:
+            locale = locales.getLocale(locale)
+            if correlated and not locale.hasFile('places'):
+                raise ValueError('The locale %s has no places.' % locale.name)
+            self._useLocale(locale, correlated)
+        elif correlated:
+            self.placesFile = self.usPlacesFile
 
-        with io.open(os.path.join(path, self.citiesFile), 'r',
-                     encoding='latin-1') as file:
-            self.cities = [e.strip() for e in file.readlines()]
+    def _useLocale(self, locale, correlated=False):
+        locale = useLocale(self, locale)
+        # The places are used if requested or if the pack has no cities, in
+        # which case the cities and states are not required.
+        usePlaces = locale.hasFile('places') and (
+            correlated or not locale.hasFile('cities'))
+        names = ['streetNames', 'streetPostfix']
+        names += ['places'] if usePlaces else ['cities', 'states']
+        for name in ('streetNames', 'streetPostfix', 'cities', 'states',
+                     'places'):
+            setattr(self, name + 'File',
+                    locale.filename(name) if name in names else None)
+        rules = locale.rules.get('address', {})
+        self.streetTemplate = rules.get('street', self.streetTemplate)
+        self.streetNumbers = tuple(rules.get('numbers', self.streetNumbers))
+        self.apartmentTemplate = rules.get('apartment')
+        self.apartmentRatio = rules.get('apartmentRatio', 0)
+        self.apartmentNumbers = tuple(
+            rules.get('apartments', self.apartmentNumbers))
+        self.zipTemplate = rules.get('zip', self.zipTemplate)
+        self.zipCodes = tuple(rules.get('zips', self.zipCodes))
 
-        with io.open(os.path.join(path, self.statesFile), 'r',
-                     encoding='latin-1') as file:
-            self.states = [e.strip() for e in file.readlines()]
+    @property
+    def placeIndex(self):
+        """The index of the places or ``None`` without places."""
+        if self._placeIndex is None and self.placesFile is not None:
+            weights = self.cityWeights
+            if weights is not None:
+                rows = self.places
+                self._placeIndex = PlaceIndex(
+                    rows, [weights(row[1]) for row in rows if row])
+            else:
+                self._placeIndex = data.cache.derive(
+                    os.path.join(self.path, self.placesFile), 'index',
+                    PlaceIndex, self.encoding, 'csv')
+        return self._placeIndex
+
+    @property
+    def cityTable(self):
+        """The alias table of the city weights or ``None``."""
+        weights = self.cityWeights
+        if self._cityTable is None and weights is not None:
+            self._cityTable = data.AliasTable(
+                [weights(city) for city in self.cities])
+        return self._cityTable
+
+    def _localStreet(self, rnd):
+        names = self.streetNames
+        postfixes = self.streetPostfix
+        low, high = self.streetNumbers
+        street = self.streetTemplate % {
+            'number': low + int(rnd() * (high - low + 1)),
+            'name': names[int(rnd() * len(names))],
+            'postfix': postfixes[int(rnd() * len(postfixes))]}
+        if self.apartmentTemplate and rnd() < self.apartmentRatio:
+            low, high = self.apartmentNumbers
+            street += self.apartmentTemplate % (
+                low + int(rnd() * (high - low + 1)))
+        return street
+
+    def _localPlace(self, rnd):
+        """Select the city, state and zip code."""
+        if self.placesFile is not None:
+            city, state, zipCode = self.placeIndex.draw(rnd)
+        else:
+            city = self._city(rnd)
+            states = self.states
+            state = states[int(rnd() * len(states))]
+            low, high = self.zipCodes
+            zipCode = low + int(rnd() * (high - low + 1))
+        return city, state, self.zipTemplate % zipCode
+
+    def _city(self, rnd):
+        cities = self.cities
+        table = self.cityTable
+        if table is not None:
+            return cities[table.draw(rnd)]
+        return cities[int(rnd() * len(cities))]
 
     def getStreet(self):
-        street = u'%i ' % self.random.randint(1, 2000)
-        street += u'%s ' % self.random.sample(self.streetNames, 1)[0]
-        street += self.random.sample(self.streetPostfix, 1)[0]
-        if self.apts and self.random.random() < 0.3:
-            street += u' Apt. %i' %self.random.randint(1, 30)
+        rnd = self.random.random
+        if self.locale is not None:
+            return self._localStreet(rnd)
+        names = self.streetNames
+        postfixes = self.streetPostfix
+        street = u'%i %s %s' % (
+            1 + int(rnd() * 2000),
+            names[int(rnd() * len(names))],
+            postfixes[int(rnd() * len(postfixes))])
+        if self.apts and rnd() < 0.3:
+            street += u' Apt. %i' % (1 + int(rnd() * 30))
         return street
 
     def getCity(self):
-        return self.random.sample(self.cities, 1)[0]
+        if self.placesFile is not None:
+            return self._localPlace(self.random.random)[0]
+        return self._city(self.random.random)
 
     def getState(self):
-        return self.random.sample(self.states, 1)[0]
+        if self.placesFile is not None:
+            return self._localPlace(self.random.random)[1]
+        states = self.states
+        return states[int(self.random.random() * len(states))]
 
     def getZip(self):
-        return u'%.5i' % self.random.randint(1000, 99999)
+        if self.placesFile is not None:
+            return self._localPlace(self.random.random)[2]
+        low, high = self.zipCodes
+        return self.zipTemplate % self.random.randint(low, high)
 
     def get(self):
         """Select a value from the values list and return it."""
+        if self.locale is not None or self.placesFile is not None:
+            return self.getMany(1)[0]
         return self.getStreet(), self.getCity(), self.getState(), self.getZip()
 
     def getMany(self, number):
         """Select a set of values from the values list and return them."""
-        return [self.get() for count in range(number)]
+        rnd = self.random.random
+        if self.locale is not None:
+            street = self._localStreet
+            place = self._localPlace
+            return [(street(rnd),) + place(rnd) for count in range(number)]
+        names, nnames = self.streetNames, len(self.streetNames)
+        postfixes, npostfixes = self.streetPostfix, len(self.streetPostfix)
+        apts = self.apts
+        index = None
+        if self.placesFile is not None:
+            # The place index is inlined, since this is the hot loop.
+            index = self.placeIndex
+            prob, alias, size = index.prob, index.alias, len(index)
+            places, lows, spans = index.places, index.lows, index.spans
+        else:
+            cities, ncities = self.cities, len(self.cities)
+            table = self.cityTable
+            states, nstates = self.states, len(self.states)
+        result = []
+        append = result.append
+        for count in range(number):
+            street = u'%i %s %s' % (
+                1 + int(rnd() * 2000),
+                names[int(rnd() * nnames)],
+                postfixes[int(rnd() * npostfixes)])
+            if apts and rnd() < 0.3:
+                street += u' Apt. %i' % (1 + int(rnd() * 30))
+            if index is not None:
+                value = rnd() * size
+                idx = int(value)
+                value -= idx
+                limit = prob[idx]
+                if value < limit:
+                    value /= limit
+                else:
+                    value = (value - limit) / (1.0 - limit)
+                    idx = alias[idx]
+                city, state = places[idx]
+                append((street, city, state,
+                        u'%.5i' % (lows[idx] + int(value * spans[idx]))))
+                continue
+            if table is not None:
+                city = cities[table.draw(rnd)]
+            else:
+                city = cities[int(rnd() * ncities)]
+            append((street,
+                    city,
+                    states[int(rnd() * nstates)],
+                    u'%.5i' % (1000 + int(rnd() * 99000))))
+        return result
+
 
+class PhoneDataGenerator(generator.VectorizedMixin,
+                         generator.DataGenerator):
+    """A phone data generator.
 
-class PhoneDataGenerator(object):
-    """A phone data generator."""
+    With a ``locale``, the phone numbers of the locale pack are computed.
+    """
 
     template = u'%i-%.3i-%.4i'
+    components = ((100, 999), (1, 999), (1, 9999))
     fivesAreaCode = False
+    locale = None
 
-    def __init__(self, seed, fivesAreaCode=False):
-        self.random = random.Random(generator.consistent_hash(seed+'phone'))
+    def __init__(self, seed, fivesAreaCode=False, backend=None, locale=None):
+        self._initRandom(seed+'phone')
         self.fivesAreaCode = fivesAreaCode
+        self.backend = generator.checkBackend(backend)
+        if locale is not None:
+            self.locale = locale = locales.getLocale(locale)
+            rules = locale.rule('phone', ('template', 'components'))
+            self.template = rules['template']
+            self.components = _components(rules)
+
+    def _isDefault(self):
+        return self.components == PhoneDataGenerator.components
 
     def get(self):
         """Compute a social security number."""
         randint = self.random.randint
+        if not self._isDefault():
+            return self.template % tuple(
+                low if low == high else randint(low, high)
+                for low, high in self.components)
         areaCode = 555 if self.fivesAreaCode else randint(100, 999)
         return self.template %(areaCode, randint(1, 999), randint(1, 9999))
 
     def getMany(self, number):
         """Select a set of values from the values list and return them."""
-        return [self.get() for count in range(number)]
+        if not self._isDefault():
+            rnd = self.random.random
+            template = self.template
+            components = self.components
+            return [template % _draw(rnd, components)
+                    for count in range(number)]
+        if self._useNumPy() and self.template == PhoneDataGenerator.template:
+            return self._getManyNumPy(number)
+        rnd = self.random.random
+        template = self.template
+        if self.fivesAreaCode:
+            return [template %(555, 1 + int(rnd() * 999),
+                               1 + int(rnd() * 9999))
+                    for count in range(number)]
+        return [template %(100 + int(rnd() * 900), 1 + int(rnd() * 999),
+                           1 + int(rnd() * 9999))
+                for count in range(number)]
+
+    def _getManyNumPy(self, number):
+        values = self._drawIntegers(number, [100, 1, 1], [999, 999, 9999])
+        if self.fivesAreaCode:
+            values[:, 0] = 555
+        return generator.formatColumns(
+            number, (values[:, 0], 3), u'-', (values[:, 1], 3), u'-',
+            (values[:, 2], 4))
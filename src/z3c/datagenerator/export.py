@@ -0,0 +1,293 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Bulk Data Export"""
+__docformat__ = "reStructuredText"
+import csv
+import datetime
+import gzip
+import io
+import json
+import time
+import zope.interface
+
+from z3c.datagenerator import generator, interfaces, record
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+COMPRESSIONS = (None, 'gzip', 'zstd')
+
+
+class ExportStatistics(object):
+    """Statistics of a finished export."""
+
+    def __init__(self, rows, bytes, seconds):
+        self.rows = rows
+        self.bytes = bytes
+        self.seconds = seconds
+
+    @property
+    def rowsPerSecond(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytesPerSecond(self):
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return '<%s rows=%i bytes=%i rows/s=%.0f bytes/s=%.0f>' % (
+            self.__class__.__name__, self.rows, self.bytes,
+            self.rowsPerSecond, self.bytesPerSecond)
+
+
+class CountingWriter(object):
+    """A binary file wrapper counting the written bytes."""
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    @property
+    def closed(self):
+        return self.file.closed
+
+
+def _cell(value):
+    if isinstance(value, tuple):
+        return u', '.join(_cell(item) for item in value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _json(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError('%r is not JSON serializable' % value)
+
+
+@zope.interface.implementer(interfaces.IExporter)
+class Exporter(object):
+    """Base functionality of exporters.
+
+    Rows are computed and written in chunks of ``chunksize`` rows, each in a
+    single write to a buffer of ``buffersize`` bytes.
+    """
+
+    compression = None
+    chunksize = 10000
+    buffersize = 1 << 20
+
+    def __init__(self, compression=None, chunksize=None, buffersize=None):
+        if compression not in COMPRESSIONS:
+            raise ValueError('Unknown compression: %r' % compression)
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError('The zstd compression requires `zstandard`.')
+        self.compression = compression
+        self.chunksize = chunksize or self.chunksize
+        self.buffersize = buffersize or self.buffersize
+
+    def _source(self, source):
+        if isinstance(source, (list, tuple)):
+            source = record.RecordGenerator('', source, rowFactory=tuple)
+        return source
+
+    def _names(self, source, row):
+        names = getattr(source, 'names', None)
+        if names:
+            return list(names)
+        if isinstance(row, tuple):
+            return ['value%i' % (idx + 1) for idx in range(len(row))]
+        return ['value']
+
+    def _open(self, output):
+        if hasattr(output, 'write'):
+            return output, False
+        return io.open(output, 'wb', buffering=self.buffersize), True
+
+    def _compress(self, file):
+        if self.compression == 'gzip':
+            return gzip.GzipFile(fileobj=file, mode='wb')
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor().stream_writer(file)
+        return None
+
+    def export(self, source, number, output, progress=None):
+        """Export ``number`` rows of the source to the output.
+
+        The source is a data generator or a sequence of ``(name, generator)``
+        pairs, which are combined into a record generator. The output is a
+        filename or a binary file. If given, ``progress`` is called with the
+        statistics after every chunk.
+        """
+        source = self._source(source)
+        start = time.time()
+        file, close = self._open(output)
+        counter = CountingWriter(file)
+        compressor = self._compress(counter)
+        stream = compressor if compressor is not None else counter
+        rows = 0
+        try:
+            names = None
+            chunks = generator.iterMany(source, number, self.chunksize)
+            for chunk in chunks:
+                if names is None:
+                    names = self._names(source, chunk[0])
+                    self.writeHeader(stream, names)
+                self.writeChunk(stream, names, chunk)
+                rows += len(chunk)
+                if progress is not None:
+                    progress(ExportStatistics(
+                        rows, counter.bytes, time.time() - start))
+            self.writeFooter(stream)
+            if self.compression == 'gzip':
+                compressor.close()
+            elif self.compression == 'zstd':
+                compressor.flush(zstandard.FLUSH_FRAME)
+            counter.flush()
+        finally:
+            if close:
+                file.close()
+        return ExportStatistics(rows, counter.bytes, time.time() - start)
+
+    def writeHeader(self, stream, names):
+        pass
+
+    def writeChunk(self, stream, names, chunk):
+        raise NotImplementedError
+
+    def writeFooter(self, stream):
+        pass
+
+
+class CSVExporter(Exporter):
+    """Exports rows as `;`-delimited CSV with a header row.
+
+    Nested tuples, like addresses, are joined into a single cell.
+    """
+
+    delimiter = ';'
+    header = True
+
+    def __init__(self, compression=None, chunksize=None, buffersize=None,
+                 delimiter=None, header=True):
+        super(CSVExporter, self).__init__(compression, chunksize, buffersize)
+        self.delimiter = delimiter or self.delimiter
+        self.header = header
+
+    def _write(self, stream, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(
+            buffer, delimiter=self.delimiter, lineterminator='\n')
+        writer.writerows(rows)
+        stream.write(buffer.getvalue().encode('utf-8'))
+
+    def writeHeader(self, stream, names):
+        if self.header:
+            self._write(stream, [names])
+
+    def writeChunk(self, stream, names, chunk):
+        if isinstance(chunk[0], tuple):
+            rows = [[_cell(value) for value in row] for row in chunk]
+        else:
+            rows = [[_cell(value)] for value in chunk]
+        self._write(stream, rows)
+
+
+class JSONLinesExporter(Exporter):
+    """Exports every row as a JSON object on its own line."""
+
+    def writeChunk(self, stream, names, chunk):
+        dumps = json.dumps
+        if not isinstance(chunk[0], tuple):
+            name = names[0]
+            lines = [dumps({name: value}, default=_json) for value in chunk]
+        else:
+            lines = [dumps(dict(zip(names, row)), default=_json)
+                     for row in chunk]
+        lines.append(u'')
+        stream.write(u'\n'.join(lines).encode('utf-8'))
+
+
+class ParquetExporter(Exporter):
+    """Exports rows to a Parquet file, one row group per chunk.
+
+    This exporter requires `pyarrow`. The compression is applied by Parquet
+    to each column, so that `zstandard` is not needed for ``zstd``.
+    """
+
+    def __init__(self, compression=None, chunksize=None, buffersize=None):
+        if pyarrow is None:
+            raise ValueError('The Parquet export requires `pyarrow`.')
+        if compression not in COMPRESSIONS:
+            raise ValueError('Unknown compression: %r' % compression)
+        super(ParquetExporter, self).__init__(
+            None, chunksize, buffersize)
+        self.parquetCompression = compression or 'none'
+
+    def export(self, source, number, output, progress=None):
+        self._writer = None
+        try:
+            return super(ParquetExporter, self).export(
+                source, number, output, progress)
+        finally:
+            self._writer = None
+
+    def writeChunk(self, stream, names, chunk):
+        if isinstance(chunk[0], tuple):
+            columns = [list(column) for column in zip(*chunk)]
+        else:
+            columns = [chunk]
+        table = pyarrow.Table.from_arrays(
+            [pyarrow.array(column) for column in columns], names=names)
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(
+                pyarrow.PythonFile(stream, mode='w'), table.schema,
+                compression=self.parquetCompression)
+        self._writer.write_table(table)
+
+    def writeFooter(self, stream):
+        if self._writer is not None:
+            self._writer.close()
+
+
+EXPORTERS = {
+    'csv': CSVExporter,
+    'jsonl': JSONLinesExporter,
+    'parquet': ParquetExporter,
+    }
+
+
+def export(source, number, output, format='csv', progress=None, **kw):
+    """Export ``number`` rows of the source in the given format."""
+    try:
+        factory = EXPORTERS[format]
+    except KeyError:
+        raise ValueError('Unknown format: %r' % format)
+    return factory(**kw).export(source, number, output, progress)
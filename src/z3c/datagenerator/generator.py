@@ -13,16 +13,29 @@
 ##############################################################################
 """Data Generators"""
 __docformat__ = "reStructuredText"
-import csv
 import datetime
+import itertools
 import math
-import io
+import operator
 import os
+import random as stdrandom
 import random2 as random
 import zope.interface
 from zlib import crc32
 
-from z3c.datagenerator import interfaces
+from z3c.datagenerator import data, interfaces
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PYTHON = 'python'
+NUMPY = 'numpy'
+BACKENDS = (PYTHON, NUMPY)
+
+# The backend used by generators that do not select one explicitly.
+BACKEND = PYTHON
 
 
 def consistent_hash(buf):
@@ -31,86 +44,901 @@ def consistent_hash(buf):
     return crc32(buf.encode('UTF-8')) & 0xffffffff
 
 
+def choose(random, values, number):
+    """Select ``number`` values with replacement.
+
+    Each value consumes exactly one draw from the random number generator, so
+    that the result is identical to selecting the values one by one using
+    ``values[int(random() * len(values))]``, which in turn is what
+    ``Random.sample(values, 1)[0]`` computes.
+    """
+    size = len(values)
+    return [values[int(random() * size)] for count in range(number)]
+
+
+_MASK64 = 0xffffffffffffffff
+_GOLDEN64 = 0x9e3779b97f4a7c15
+
+
+def _mix64(value):
+    # The SplitMix64 finalizer; a bijection scrambling all 64 bits.
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return value ^ (value >> 31)
+
+
+class CounterRandom(random.Random):
+    """A counter-based random number generator.
+
+    The numbers drawn for an index only depend on the key and the index, so
+    that any position of the stream can be computed directly after calling
+    ``seek(index)``.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.seek(0)
+
+    def seek(self, index):
+        """Start drawing the numbers of the given index."""
+        self._state = _mix64(_mix64(self.key) ^ (index & _MASK64))
+
+    def random(self):
+        self._state = (self._state + _GOLDEN64) & _MASK64
+        return (_mix64(self._state) >> 11) * (1.0 / 9007199254740992.0)
+
+
+class Permutation(object):
+    """A keyed pseudo-random permutation of ``range(size)``.
+
+    The permutation is computed by a balanced Feistel network over the
+    smallest even number of bits covering the size. Results outside of the
+    range are encrypted again ("cycle walking"), so that any index is mapped
+    in constant time and memory.
+    """
+
+    rounds = 4
+
+    def __init__(self, size, key):
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        self._keys = [_mix64((key << 8) + idx) for idx in range(self.rounds)]
+
+    def __len__(self):
+        return self.size
+
+    def _encrypt(self, value):
+        half, mask = self._half, self._mask
+        left, right = value >> half, value & mask
+        for key in self._keys:
+            left, right = right, left ^ (_mix64(right ^ key) & mask)
+        return (left << half) | right
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+def iterChunks(getMany, number, chunksize, chunked=False):
+    """Iterate over the values computed by ``getMany`` chunk by chunk.
+
+    If ``number`` is None, the iteration never ends. If ``chunked`` is set,
+    the lists returned by ``getMany`` are yielded instead of the values.
+    """
+    remaining = number
+    while remaining is None or remaining > 0:
+        size = chunksize if remaining is None else min(chunksize, remaining)
+        values = getMany(size)
+        if remaining is not None:
+            remaining -= size
+        if chunked:
+            yield values
+        else:
+            for value in values:
+                yield value
+
+
+def checkBackend(name):
+    if name is not None and name not in BACKENDS:
+        raise ValueError('Unknown backend: %r' % name)
+    return name
+
+
+def setBackend(name):
+    """Select the backend used by all generators not selecting their own."""
+    global BACKEND
+    BACKEND = checkBackend(name)
+
+
+class NumPyRandom(stdrandom.Random):
+    """A random number generator drawing from a NumPy bit generator.
+
+    The numbers are drawn in blocks of ``blocksize`` values. ``random()`` is
+    the ``next()`` method of an iterator over the blocks, so that no Python
+    code runs per number and a call costs as much as the one of the
+    standard library. All other methods are the ones of the standard
+    library.
+
+    The state consists of the state of the bit generator before the current
+    block, or its current state if no block was drawn yet, and the amount of
+    numbers consumed from the block.
+    """
+
+    bitGenerator = None
+    blocksize = 4096
+
+    def seed(self, a=None, version=2):
+        self._generator = numpy.random.Generator(self.bitGenerator(a))
+        self._blockState = None
+        self._block = iter(())
+        self.random = itertools.chain.from_iterable(
+            iter(self._nextBlock, None)).__next__
+        self.gauss_next = None
+
+    def _nextBlock(self):
+        self._blockState = self._generator.bit_generator.state
+        self._block = iter(
+            self._generator.random(self.blocksize).tolist())
+        return self._block
+
+    def random(self):
+        # Replaced by the iterator over the blocks when seeded; defined, so
+        # that the methods of the standard library use it.
+        return self.random()
+
+    def getstate(self):
+        if self._blockState is None:
+            # No block was drawn yet.
+            return self._generator.bit_generator.state, 0, self.gauss_next
+        consumed = self.blocksize - operator.length_hint(self._block)
+        return self._blockState, consumed, self.gauss_next
+
+    def setstate(self, state):
+        blockState, consumed, gauss_next = state
+        self.seed()
+        self._generator.bit_generator.state = blockState
+        for count in range(consumed):
+            self.random()
+        self.gauss_next = gauss_next
+
+
+LEGACY = 'legacy'
+
+# The random number generator backends: name -> factory called with the
+# seed hash.
+RNGS = {
+    LEGACY: random.Random,
+    'stdlib': stdrandom.Random,
+    }
+
+# The versions of the streams of the random number generator backends. A
+# version is increased whenever the values computed from a seed change.
+RNG_VERSIONS = {
+    LEGACY: 1,
+    'stdlib': 1,
+    }
+
+if numpy is not None:
+    class PCG64Random(NumPyRandom):
+        bitGenerator = numpy.random.PCG64
+
+    class PhiloxRandom(NumPyRandom):
+        bitGenerator = numpy.random.Philox
+
+    RNGS.update(pcg64=PCG64Random, philox=PhiloxRandom)
+    RNG_VERSIONS.update(pcg64=1, philox=1)
+
+# The random number generator backend used by generators that do not select
+# their own. The legacy backend reproduces the values of all releases.
+RNG = LEGACY
+
+
+def checkRNG(name):
+    if name is not None and name not in RNGS:
+        raise ValueError('Unknown random number generator: %r' % name)
+    return name
+
+
+def setRNG(name):
+    """Select the random number generator backend used by default."""
+    global RNG
+    RNG = checkRNG(name)
+
+
+def formatColumns(number, *parts):
+    """Format ``number`` fixed-width strings from integer columns in bulk.
+
+    Each part is either an ASCII text literal or a ``(values, width)`` tuple,
+    where ``values`` is a NumPy integer array of non-negative numbers that
+    are rendered zero-padded to ``width`` digits.
+    """
+    width = sum(len(part) if not isinstance(part, tuple) else part[1]
+                for part in parts)
+    buffer = numpy.empty((number, width), dtype=numpy.uint8)
+    pos = 0
+    for part in parts:
+        if not isinstance(part, tuple):
+            buffer[:, pos:pos+len(part)] = numpy.frombuffer(
+                part.encode('ascii'), dtype=numpy.uint8)
+            pos += len(part)
+            continue
+        values, digits = part
+        for idx in range(pos + digits - 1, pos - 1, -1):
+            buffer[:, idx] = values % 10 + 48
+            values = values // 10
+        pos += digits
+    return buffer.view('S%i' % width).ravel().astype('U%i' % width).tolist()
+
+
+class VectorizedMixin(object):
+    """Support for computing ``getMany()`` with the NumPy backend.
+
+    The NumPy backend uses its own random number stream, so that its values
+    differ from the ones of the Python backend for the same seed. Values are
+    always drawn row by row, so that the stream does not depend on how the
+    values are split across ``getMany()`` calls.
+    """
+
+    backend = None
+    _numpyRandom = None
+
+    def _useNumPy(self, backend=None):
+        backend = backend or self.backend or BACKEND
+        return numpy is not None and backend == NUMPY
+
+    @property
+    def numpyRandom(self):
+        """The NumPy random number generator of the NumPy backend."""
+        if self._numpyRandom is None:
+            self._numpyRandom = numpy.random.Generator(
+                numpy.random.PCG64(self._seedHash))
+        return self._numpyRandom
+
+    def _drawIntegers(self, number, lows, highs):
+        """Draw ``number`` rows of integers between ``lows`` and ``highs``.
+
+        Like ``randint()``, both end points are included.
+        """
+        lows = numpy.array(lows, dtype=numpy.int64)
+        widths = numpy.array(highs, dtype=numpy.int64) - lows + 1
+        draws = self.numpyRandom.random((number, len(widths)))
+        return (draws * widths).astype(numpy.int64) + lows
+
+
+class UniqueMixin(object):
+    """Support for generating distinct values of a numeric space.
+
+    The space consists of integer components, given as ``(low, high)``
+    tuples with both end points included. In unique mode, the n-th value is
+    computed from the n-th element of a keyed permutation of the space, so
+    that values are distinct without remembering them.
+    """
+
+    unique = False
+    components = ()
+    _uniqueIndex = 0
+    _permutation = None
+
+    @property
+    def space(self):
+        """The amount of distinct values."""
+        size = 1
+        for low, high in self.components:
+            size *= high - low + 1
+        return size
+
+    @property
+    def permutation(self):
+        if self._permutation is None:
+            self._permutation = Permutation(self.space, self._seedHash)
+        return self._permutation
+
+    def _components(self, value):
+        result = []
+        for low, high in reversed(self.components):
+            width = high - low + 1
+            result.append(low + value % width)
+            value //= width
+        result.reverse()
+        return tuple(result)
+
+    def _checkSpace(self, start, number):
+        if start + number > self.space:
+            raise ValueError(
+                'Only %i unique values are available, but %i were requested.'
+                % (self.space - start, number))
+
+    def _drawUnique(self, number):
+        """Return the components of the next ``number`` distinct values."""
+        start = self._uniqueIndex
+        self._checkSpace(start, number)
+        self._uniqueIndex = start + number
+        return self._rangeUnique(start, start + number)
+
+    def _rangeUnique(self, start, stop):
+        permutation = self.permutation
+        components = self._components
+        return [components(permutation[index])
+                for index in range(start, stop)]
+
+
+@zope.interface.implementer(interfaces.IDataGenerator)
+class DataGenerator(object):
+    """Common functionality of all data generators."""
+
+    # The amount of values computed at once when iterating.
+    chunksize = 1000
+
+    # The names of the attributes holding nested generators.
+    _nested = ()
+    _seedHash = 0
+    _counterRandom = None
+    rng = None
+
+    def _initRandom(self, seed):
+        self._seedHash = consistent_hash(seed)
+        self.rng = self.rng or RNG
+        self.random = RNGS[self.rng](self._seedHash)
+
+    def useRNG(self, name):
+        """Use the random number generator backend ``name`` from now on.
+
+        This generator and all nested ones are seeded again.
+        """
+        checkRNG(name)
+        self.rng = name
+        for gen in self._generators():
+            gen.rng = name
+            gen.random = RNGS[name](gen._seedHash)
+        return self
+
+    @property
+    def streamVersion(self):
+        """The version of the values computed by this generator.
+
+        The values computed from a seed are identical for equal versions.
+        If this or a nested generator computes ``getMany()`` with the NumPy
+        backend, which uses its own stream, ``+numpy`` is appended.
+        """
+        rng = self.rng or RNG
+        version = '%s-%i' % (rng, RNG_VERSIONS[rng])
+        if any(isinstance(gen, VectorizedMixin) and gen._useNumPy()
+               for gen in self._generators()):
+            version += '+' + NUMPY
+        return version
+
+    def _generators(self):
+        """Iterate over this generator and all nested generators."""
+        yield self
+        for name in self._nested:
+            for gen in getattr(self, name)._generators():
+                yield gen
+
+    def getAt(self, index):
+        """Compute the value at the index of the counter-based stream."""
+        return self.getRange(index, index + 1)[0]
+
+    def getRange(self, start, stop):
+        """Compute the values from start to stop of the counter-based stream.
+
+        Every value only depends on the seed and its index, so that it is
+        computed without computing any of the values before it.
+        """
+        gens = list(self._generators())
+        counters = []
+        for gen in gens:
+            if gen._counterRandom is None:
+                gen._counterRandom = CounterRandom(gen._seedHash)
+            counters.append(gen._counterRandom)
+        saved = [gen.random for gen in gens]
+        for gen, counter in zip(gens, counters):
+            gen.random = counter
+        try:
+            values = []
+            for index in range(start, stop):
+                for counter in counters:
+                    counter.seek(index)
+                values.append(self.get())
+            return values
+        finally:
+            for gen, rnd in zip(gens, saved):
+                gen.random = rnd
+
+    def iterMany(self, number=None, chunksize=None):
+        """Iterate over the values, optionally in chunks of values."""
+        return iterChunks(
+            self.getMany, number, chunksize or self.chunksize, bool(chunksize))
+
+    def __iter__(self):
+        return self.iterMany()
+
+    def agetMany(self, number, chunksize=None, executor=None):
+        """Compute the values without blocking the event loop.
+
+        See ``z3c.datagenerator.aio.getMany()``.
+        """
+        from z3c.datagenerator import aio
+        return aio.getMany(self, number, chunksize, executor)
+
+    def aiterMany(self, number=None, chunksize=None, executor=None):
+        """Iterate asynchronously over the values.
+
+        See ``z3c.datagenerator.aio.iterMany()``.
+        """
+        from z3c.datagenerator import aio
+        return aio.iterMany(self, number, chunksize, executor)
+
+    def __aiter__(self):
+        return self.aiterMany()
+
+
+class SampleDataGenerator(DataGenerator):
+    """Common functionality of generators selecting from a set of values."""
+
+    def iterMany(self, number=None, chunksize=None, replace=False):
+        """Iterate over the values, optionally in chunks of values.
+
+        Without replacement, all values are selected upfront, since the
+        values must be distinct anyways.
+        """
+        if replace:
+            getMany = lambda size: self.getMany(size, replace=True)
+        elif number is None:
+            raise ValueError(
+                'The number of values is required without replacement.')
+        else:
+            values = iter(self.getMany(number))
+            getMany = lambda size: list(itertools.islice(values, size))
+        return iterChunks(
+            getMany, number, chunksize or self.chunksize, bool(chunksize))
+
+    def __iter__(self):
+        return self.iterMany(replace=True)
+
+
+def getMany(gen, number):
+    """Compute ``number`` values of any generator for bulk consumers.
+
+    Generators selecting from a set of values select with replacement, so
+    that any number of values is available.
+    """
+    if isinstance(gen, SampleDataGenerator):
+        return gen.getMany(number, replace=True)
+    return gen.getMany(number)
+
+
+def iterMany(gen, number=None, chunksize=None):
+    """Iterate over the values of any generator, see ``getMany()``."""
+    if isinstance(gen, SampleDataGenerator):
+        return gen.iterMany(number, chunksize, replace=True)
+    return gen.iterMany(number, chunksize)
+
+
 @zope.interface.implementer(interfaces.IDataGenerator)
-class VocabularyDataGenerator(object):
-    """Vocabulary-based data generator"""
+class VocabularyDataGenerator(SampleDataGenerator):
+    """Vocabulary-based data generator
+
+    The values of all terms are copied into a tuple once, when they are
+    first needed, so that every value is selected in constant time. With
+    ``refresh`` set, the values are copied again whenever the size of the
+    vocabulary changed. ``invalidate()`` forces copying them again.
+    """
+
+    refresh = False
+    _values = None
 
-    def __init__(self, seed, vocabulary):
-        self.random = random.Random(consistent_hash(seed))
+    def __init__(self, seed, vocabulary, refresh=False):
+        self._initRandom(seed)
         self.vocabulary = vocabulary
+        self.refresh = refresh
+
+    @property
+    def vocabulary(self):
+        return self._vocabulary
+
+    @vocabulary.setter
+    def vocabulary(self, vocabulary):
+        self._vocabulary = vocabulary
+        self._values = None
+
+    @property
+    def values(self):
+        """The values of all terms of the vocabulary."""
+        values = self._values
+        if values is None or (
+                self.refresh and len(values) != len(self._vocabulary)):
+            values = self._values = tuple(
+                term.value for term in self._vocabulary)
+        return values
+
+    def invalidate(self):
+        """Forget the values, so that they are copied again when needed."""
+        self._values = None
+
+    def _wastesDraw(self, number):
+        # Former versions sampled the vocabulary itself. For large
+        # vocabularies, ``sample()`` first drew an index of the vocabulary,
+        # which failed unless it was a sequence, and started over with a
+        # tuple of the terms. That draw is skipped to keep the values.
+        setsize = 21
+        if number > 5:
+            setsize += 4 ** int(math.ceil(math.log(number * 3, 4)))
+        return (len(self.values) > setsize and
+                not isinstance(self._vocabulary, (list, tuple)))
 
     def get(self):
         """Select a value from the values list and return it."""
-        return self.random.sample(self.vocabulary, 1)[0].value
+        values = self.values
+        rnd = self.random.random
+        if self._wastesDraw(1):
+            rnd()
+        return values[int(rnd() * len(values))]
 
-    def getMany(self, number):
-        """Select a set of values from the values list and return them."""
-        return [term.value
-                for term in self.random.sample(self.vocabulary, number)]
+    def getMany(self, number, replace=False):
+        """Select a set of values from the values list and return them.
+
+        Unless ``replace`` is set, all selected values are distinct.
+        """
+        if replace:
+            if not self._wastesDraw(1):
+                return choose(self.random.random, self.values, number)
+            values = self.values
+            size = len(values)
+            rnd = self.random.random
+            return [values[int((rnd(), rnd())[1] * size)]
+                    for count in range(number)]
+        if self._wastesDraw(number):
+            self.random.random()
+        return self.random.sample(self.values, number)
 
 
 @zope.interface.implementer(interfaces.IFileBasedGenerator)
-class FileDataGenerator(object):
-    """Base functionality for a file data generator."""
+class FileDataGenerator(SampleDataGenerator):
+    """Base functionality for a file data generator.
+
+    The file is only read when the values are first needed. Its contents are
+    shared with all other generators using the same file through
+    ``data.cache``.
+
+    If ``weights`` are given, values are selected proportionally to their
+    weight, which is either computed by a callable receiving the value or
+    read from a column of the data file (see the subclasses). The alias table
+    of a weight column is computed once per file and shared as well. Tables
+    of callable weights are computed per generator instead, since every
+    closure would otherwise keep a table in the cache forever.
+
+    If ``compact`` is set, the values are stored in a compact sequence,
+    which is much smaller than a tuple of strings for large files. Values
+    are decoded only when selected.
+    """
 
     path = os.path.dirname(__file__)
+    encoding = 'latin-1'
+    format = 'text'
+    weights = None
+    compact = False
+    _values = None
+    _table = None
 
-    def __init__(self, seed, filename):
+    def __init__(self, seed, filename, weights=None, compact=False):
         justname = os.path.basename(filename)
-        self.random = random.Random(consistent_hash(seed+justname))
-        self.values = self._read(filename)
+        self._initRandom(seed+justname)
+        self.filename = filename
+        self.weights = weights
+        self.compact = compact
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = self._read(self.filename)
+        return self._values
+
+    @values.setter
+    def values(self, values):
+        self._values = values
+
+    @property
+    def cacheFormat(self):
+        """The format in which ``data.cache`` holds the data file."""
+        return 'compact-' + self.format if self.compact else self.format
+
+    @property
+    def table(self):
+        """The alias table of the weights or ``None`` without weights."""
+        if self._table is None and self.weights is not None:
+            self._table = self._readTable(self.filename)
+        return self._table
+
+    def _readTable(self, filename):
+        # The tables are derived from the data file in the format of the
+        # values, so that no second copy of the file is loaded.
+        fullpath = os.path.join(self.path, filename)
+        weights = self.weights
+        if callable(weights):
+            return data.AliasTable([weights(value) for value in self.values])
+        column = self._weightColumn()
+        def table(rows):
+            compiled = data.readCompiled(fullpath, 'rows', self.encoding)
+            if compiled is not None and compiled.weightColumn == column:
+                return data.AliasTable(compiled.weights)
+            return data.AliasTable(
+                [float(row[column]) if len(row) > column else 1.0
+                 for row in rows])
+        return data.cache.derive(
+            fullpath, ('weights', column), table, self.encoding,
+            self.cacheFormat)
+
+    def _weightColumn(self):
+        raise ValueError('Unsupported weights: %r' % self.weights)
 
     def get(self):
         """Select a value from the values list and return it."""
-        return self.random.sample(self.values, 1)[0]
+        values = self.values
+        table = self.table
+        if table is not None:
+            return values[table.draw(self.random.random)]
+        return values[int(self.random.random() * len(values))]
 
-    def getMany(self, number):
-        """Select a set of values from the values list and return them."""
+    def getMany(self, number, replace=False):
+        """Select a set of values from the values list and return them.
+
+        Unless ``replace`` is set, all selected values are distinct. Weighted
+        values are always selected with replacement.
+        """
+        table = self.table
+        if table is not None:
+            values = self.values
+            return [values[idx]
+                    for idx in table.drawMany(self.random.random, number)]
+        if replace:
+            return choose(self.random.random, self.values, number)
         return self.random.sample(self.values, number)
 
 
 class CSVDataGenerator(FileDataGenerator):
-    """CSV-based data generator."""
+    """CSV-based data generator.
+
+    An integer ``weights`` is the index of the column providing the weights.
+    """
+
+    format = 'csv'
 
     def _read(self, filename):
         fullpath = os.path.join(self.path, filename)
-        with io.open(fullpath, 'r', encoding='latin-1') as file:
-            reader = csv.reader(file, delimiter=';')
-            return [[cell for cell in row] for row in reader]
+        return data.cache.load(fullpath, self.encoding, self.cacheFormat)
+
+    def _weightColumn(self):
+        if isinstance(self.weights, bool) or \
+                not isinstance(self.weights, int):
+            return super(CSVDataGenerator, self)._weightColumn()
+        return self.weights
 
 
 class TextDataGenerator(FileDataGenerator):
-    """Text lines based data generator."""
+    """Text lines based data generator.
+
+    If ``weights`` is ``True``, every line has the form ``value;weight``.
+    Lines without a weight have a weight of 1.
+    """
+
+    format = 'text'
+
+    @property
+    def cacheFormat(self):
+        """The format in which ``data.cache`` holds the data file.
+
+        Lines with weights are held as rows, from which the values are
+        derived.
+        """
+        format = 'csv' if self.weights is True else 'text'
+        return 'compact-' + format if self.compact else format
 
     def _read(self, filename):
         fullpath = os.path.join(self.path, filename)
-        with io.open(fullpath, 'r', encoding='latin-1') as file:
-            return [e.strip() for e in file.readlines()]
+        if self.weights is True:
+            factory = data.CompactSequence.fromValues if self.compact \
+                else tuple
+            return data.cache.derive(
+                fullpath, 'values',
+                lambda rows: factory(row[0].strip() if row else u''
+                                     for row in rows),
+                self.encoding, self.cacheFormat)
+        return data.cache.load(fullpath, self.encoding, self.cacheFormat)
+
+    def _weightColumn(self):
+        if self.weights is not True:
+            return super(TextDataGenerator, self)._weightColumn()
+        return 1
+
+
+# The distributions of the date data generator.
+DISTRIBUTIONS = ('uniform', 'recent', 'weekdays', 'businessHours')
+
+_DAY = 86400000000
+# The largest float below 1.0.
+_BELOW_ONE = 1.0 - 2.0 ** -53
+
+
+def _microseconds(delta):
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _datetime(value, tzinfo):
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    if tzinfo is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=tzinfo)
+    return value
 
 
 @zope.interface.implementer(interfaces.IDateDataGenerator)
-class DateDataGenerator(object):
-    """A date data generator."""
+class DateDataGenerator(VectorizedMixin, DataGenerator):
+    """A date data generator.
+
+    By default, dates are selected with a resolution of one day. Given a
+    ``resolution`` timedelta, for example one microsecond, or a ``tzinfo``,
+    datetimes are computed instead, which are timezone aware with a
+    ``tzinfo``. The ``distribution`` is one of:
+
+    ``uniform``
+      All values are equally likely.
 
-    def __init__(self, seed, start=None, end=None):
-        self.random = random.Random(consistent_hash(seed+'date'))
+    ``recent``
+      The likelihood increases linearly towards the end.
+
+    ``weekdays``
+      Mondays to Fridays between the start and end dates.
+
+    ``businessHours``
+      The business hours of weekdays between the start and end dates; the
+      resolution defaults to one second.
+
+    All values are computed as integer offsets from the start, which are
+    converted to dates in bulk.
+    """
+
+    resolution = None
+    tzinfo = None
+    distribution = 'uniform'
+    businessHours = (9, 17)
+    _prepared = None
+
+    def __init__(self, seed, start=None, end=None, backend=None,
+                 resolution=None, tzinfo=None, distribution='uniform'):
+        self._initRandom(seed+'date')
         self.start = start or datetime.date(2000, 1, 1)
         self.end = end or datetime.date(2007, 1, 1)
+        self.backend = checkBackend(backend)
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError('Unknown distribution: %r' % distribution)
+        if resolution is None and distribution == 'businessHours':
+            resolution = datetime.timedelta(seconds=1)
+        self.resolution = resolution
+        self.tzinfo = tzinfo
+        self.distribution = distribution
 
-    def get(self, start=None, end=None):
-        """Create a new date between the start and end date."""
+    def _prepare(self, start=None, end=None):
+        """Return the base, the step, the number of steps and a mapping.
+
+        The mapping turns a random number into a microseconds offset from
+        the base. It does not decrease with the random number.
+        """
         start = start or self.start
         end = end or self.end
-        delta = end - start
-        return start + datetime.timedelta(self.random.randint(0, delta.days))
+        key = (start, end)
+        if self._prepared is not None and self._prepared[0] == key:
+            return self._prepared[1]
+        if self.resolution is None:
+            step = _DAY
+            if self.tzinfo is not None:
+                start = _datetime(start, self.tzinfo)
+                end = _datetime(end, self.tzinfo)
+        else:
+            step = _microseconds(self.resolution)
+            start = _datetime(start, self.tzinfo)
+            end = _datetime(end, self.tzinfo)
+        if self.distribution in ('uniform', 'recent'):
+            base = start
+            count = _microseconds(end - start) // step + 1
+            if self.distribution == 'uniform':
+                mapping = lambda value: int(value * count) * step
+            else:
+                mapping = lambda value: int(math.sqrt(value) * count) * step
+        else:
+            base = start
+            if isinstance(start, datetime.datetime):
+                base = start.replace(hour=0, minute=0, second=0, microsecond=0)
+                start, end = start.date(), end.date()
+            days = (end - start).days + 1
+            pattern = [day for day in range(7)
+                       if (start.weekday() + day) % 7 < 5]
+            weeks, rest = divmod(days, 7)
+            weekdays = weeks * 5 + len([day for day in pattern if day < rest])
+            if self.distribution == 'weekdays':
+                first, last = 0, _DAY
+            else:
+                first = self.businessHours[0] * 3600000000
+                last = self.businessHours[1] * 3600000000
+            perDay = max((last - first) // step, 1)
+            count = weekdays * perDay
+            def mapping(value):
+                day, idx = divmod(int(value * count), perDay)
+                week, day = divmod(day, 5)
+                return (week * 7 + pattern[day]) * _DAY + first + idx * step
+        if count <= 0:
+            raise ValueError('No dates between %s and %s.' % key)
+        prepared = (base, step, count, mapping)
+        if key == (self.start, self.end):
+            self._prepared = (key, prepared)
+        return prepared
+
+    def _convert(self, base, offsets):
+        timedelta = datetime.timedelta
+        return [base + timedelta(0, 0, offset) for offset in offsets]
+
+    def get(self, start=None, end=None):
+        """Create a new date between the start and end date."""
+        base, step, count, mapping = self._prepare(start, end)
+        return base + datetime.timedelta(0, 0, mapping(self.random.random()))
 
     def getMany(self, number):
         """Select a set of values from the values list and return them."""
-        return [self.get() for count in range(number)]
+        base, step, count, mapping = self._prepare()
+        if self._useNumPy() and self.distribution == 'uniform':
+            offsets = self._drawIntegers(number, [0], [count - 1])[:, 0]
+            if not isinstance(base, datetime.datetime):
+                return (numpy.datetime64(base, 'D') + offsets).tolist()
+            values = (numpy.datetime64(base.replace(tzinfo=None), 'us') +
+                      offsets * step).tolist()
+            if base.tzinfo is not None:
+                tzinfo = base.tzinfo
+                values = [value.replace(tzinfo=tzinfo) for value in values]
+            return values
+        rnd = self.random.random
+        if self.distribution == 'uniform':
+            offsets = [int(rnd() * count) * step for idx in range(number)]
+        else:
+            offsets = [mapping(rnd()) for idx in range(number)]
+        return self._convert(base, offsets)
+
+    def iterSorted(self, number, chunksize=None):
+        """Iterate over ``number`` values in ascending order.
+
+        The values are the order statistics of ``number`` random values, each
+        computed from the previous one, so that they are produced in chunks
+        with constant memory, for example for the timestamps of an event log.
+        """
+        base, step, count, mapping = self._prepare()
+        rnd = self.random.random
+        state = [0.0, number]
+        def getMany(size):
+            current, remaining = state
+            offsets = []
+            for idx in range(size):
+                current = 1.0 - (1.0 - current) * rnd() ** (1.0 / remaining)
+                remaining -= 1
+                offsets.append(mapping(min(current, _BELOW_ONE)))
+            state[:] = [current, remaining]
+            return self._convert(base, offsets)
+        return iterChunks(
+            getMany, number, chunksize or self.chunksize, bool(chunksize))
+
+    def getSorted(self, number):
+        """Select ``number`` values in ascending order."""
+        return list(self.iterSorted(number))
+
 
+class IdDataGenerator(UniqueMixin, VectorizedMixin, DataGenerator):
+    """An ID data generator.
 
-class IdDataGenerator(object):
-    """An ID data generator."""
+    In unique mode, all IDs are distinct.
+    """
 
     prefix = 'ID'
     separator = '-'
@@ -118,23 +946,69 @@ class IdDataGenerator(object):
     max_value = 99
 
     def __init__(self, seed, prefix='ID', separator='-', numbers=4,
-                 max_value=99):
-        self.random = random.Random(consistent_hash(seed + 'id'))
+                 max_value=99, backend=None, unique=False):
+        self._initRandom(seed + 'id')
         self.prefix = prefix
         self.separator = separator
         self.numbers = numbers
         self.max_value = max_value
-        self._num_format = '%.' + str(int(math.log10(self.max_value + 1))) + 'i'
+        self._num_digits = int(math.log10(self.max_value + 1))
+        self._num_format = '%.' + str(self._num_digits) + 'i'
+        self.backend = checkBackend(backend)
+        self.unique = unique
+        self.components = ((0, max_value),) * numbers
 
     def get(self):
         """Compute a social security number."""
-        randint = self.random.randint
-        value = self.prefix
-        value += self.separator.join(
-            self._num_format % randint(0, self.max_value)
-            for idx in range(self.numbers))
-        return value
+        if self.unique:
+            return self.getMany(1)[0]
+        return self._getManyPython(1)[0]
 
     def getMany(self, number):
         """Select a set of values from the values list and return them."""
-        return [self.get() for count in range(number)]
+        if self.unique:
+            return self._format(self._drawUnique(number))
+        if self._useNumPy():
+            return self._getManyNumPy(number)
+        return self._getManyPython(number)
+
+    def getRange(self, start, stop):
+        if self.unique:
+            self._checkSpace(start, stop - start)
+            return self._format(self._rangeUnique(start, stop))
+        return super(IdDataGenerator, self).getRange(start, stop)
+
+    def _format(self, rows):
+        prefix = self.prefix
+        join = self.separator.join
+        num_format = self._num_format
+        return [prefix + join([num_format % value for value in row])
+                for row in rows]
+
+    def _getManyPython(self, number):
+        rnd = self.random.random
+        size = self.max_value + 1
+        prefix = self.prefix
+        join = self.separator.join
+        num_format = self._num_format
+        numbers = range(self.numbers)
+        return [prefix + join([num_format % int(rnd() * size)
+                               for idx in numbers])
+                for count in range(number)]
+
+    def _getManyNumPy(self, number):
+        values = self._drawIntegers(
+            number, [0] * self.numbers, [self.max_value] * self.numbers)
+        fixed = 10 ** self._num_digits == self.max_value + 1
+        try:
+            (self.prefix + self.separator).encode('ascii')
+        except UnicodeError:
+            fixed = False
+        if not fixed:
+            return self._format(values.tolist())
+        parts = [self.prefix]
+        for idx in range(self.numbers):
+            if idx:
+                parts.append(self.separator)
+            parts.append((values[:, idx], self._num_digits))
+        return formatColumns(number, *parts)
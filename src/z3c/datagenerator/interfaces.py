@@ -33,6 +33,45 @@ class IDataGenerator(zope.interface.Interface):
     def getMany(self, number):
         """Select a set of values from the values list and return them."""
 
+    def iterMany(self, number=None, chunksize=None):
+        """Iterate over ``number`` values, or infinitely many if not given.
+
+        The values are computed lazily in chunks, so that memory usage does
+        not depend on the number of values. If ``chunksize`` is given, lists
+        of that many values are produced instead of single values.
+
+        The values are identical to the ones returned by ``getMany(number)``.
+        """
+
+    def __iter__(self):
+        """Iterate infinitely over the generated values."""
+
+    def agetMany(self, number, chunksize=None, executor=None):
+        """Coroutine computing ``number`` values chunk by chunk.
+
+        Control is returned to the event loop between chunks, or the chunks
+        are computed by the ``executor``.
+        """
+
+    def aiterMany(self, number=None, chunksize=None, executor=None):
+        """Iterate asynchronously over ``number`` or infinitely many values.
+        """
+
+    def __aiter__(self):
+        """Iterate asynchronously and infinitely over the generated values."""
+
+    def getAt(self, index):
+        """Return the value at the index of the counter-based stream.
+
+        In the counter-based stream, each value only depends on the seed and
+        its index, so that it is computed without computing the values before
+        it. This stream differs from the one of ``get()`` and ``getMany()``.
+        """
+
+    def getRange(self, start, stop):
+        """Return the values from start to stop of the counter-based stream.
+        """
+
 
 class IFileBasedGenerator(IDataGenerator):
     """Data generator using a single file extract data.
@@ -43,6 +82,33 @@ class IFileBasedGenerator(IDataGenerator):
     path = zope.interface.Attribute(
         'The path to the file providing the data.')
 
+    weights = zope.interface.Attribute(
+        'Optional weights of the values: a callable computing the weight of '
+        'a value or a specification of the weights in the data file.')
+
+    compact = zope.interface.Attribute(
+        'If set, the values are stored in a compact sequence decoding the '
+        'values when they are accessed.')
+
+    cacheFormat = zope.interface.Attribute(
+        'The format in which the data file is held by the data file cache. '
+        'Weights and other derived data are computed from it.')
+
+    def getMany(self, number, replace=False):
+        """Select a set of values from the values list and return them.
+
+        Unless ``replace`` is set, the values are distinct, so that
+        ``number`` cannot exceed the amount of available values.
+        """
+
+    def iterMany(self, number=None, chunksize=None, replace=False):
+        """Iterate over ``number`` values, optionally with replacement.
+
+        The values are identical to the ones returned by
+        ``getMany(number, replace)``. Without replacement, ``number`` is
+        required.
+        """
+
 
 class IDateDataGenerator(IDataGenerator):
     """A date data generator.
@@ -66,3 +132,120 @@ class IDateDataGenerator(IDataGenerator):
         The start and end date/time can be overridden here, since you
         sometimes want to generate sequences of dates.
         """
+
+    def iterSorted(self, number, chunksize=None):
+        """Iterate over ``number`` dates/times in ascending order.
+
+        Like ``iterMany()``, the values are produced in chunks with constant
+        memory.
+        """
+
+    def getSorted(self, number):
+        """Select ``number`` dates/times in ascending order."""
+
+
+class ITextGenerator(IDataGenerator):
+    """A free text generator.
+
+    The generated values are texts of the generator's unit.
+    """
+
+    unit = zope.schema.Choice(
+        title=u'Unit',
+        description=u'The unit of the generated texts.',
+        values=('word', 'sentence', 'paragraph', 'document'),
+        required=True)
+
+    def getWord(self):
+        """Select a word."""
+
+    def getSentence(self):
+        """Compute a sentence."""
+
+    def getParagraph(self):
+        """Compute a paragraph of sentences."""
+
+    def getDocument(self):
+        """Compute a document of paragraphs."""
+
+    def getBytes(self, size):
+        """Compute ``size`` bytes of UTF-8 encoded paragraphs."""
+
+
+class IRecordGenerator(IDataGenerator):
+    """A generator of records combining the values of several generators.
+
+    Generators of fields can depend on the values of other fields, for
+    example a username can be derived from the first and last name of the
+    same record.
+    """
+
+    names = zope.interface.Attribute(
+        'The names of the fields included in the records.')
+
+    fields = zope.interface.Attribute(
+        '''A list of ``(name, generator, depends)`` tuples, one for each
+        computed field in the order of computation. ``depends`` lists the
+        positions of the fields passed to the generator's ``get()``.''')
+
+    rowFactory = zope.interface.Attribute(
+        'A callable creating a record from the list of field values.')
+
+
+class IExporter(zope.interface.Interface):
+    """Writes the values of a data generator to a file in bulk."""
+
+    compression = zope.interface.Attribute(
+        'The compression of the output: None, "gzip" or "zstd".')
+
+    chunksize = zope.interface.Attribute(
+        'The amount of rows computed and written at once.')
+
+    buffersize = zope.interface.Attribute(
+        'The size of the output buffer in bytes.')
+
+    def export(self, source, number, output, progress=None):
+        """Export ``number`` rows of the source to the output.
+
+        Returns statistics about the export, including the amount of rows and
+        bytes written per second. If given, ``progress`` is called with the
+        statistics so far after every chunk.
+        """
+
+
+class ITable(zope.interface.Interface):
+    """A table of a data set, streaming its rows in chunks."""
+
+    name = zope.interface.Attribute('The name of the table.')
+
+    names = zope.interface.Attribute(
+        '''The names of the columns: the key, the foreign key of the parent
+        row, the references to other tables and the fields.''')
+
+    depends = zope.interface.Attribute(
+        'The names of the tables this table refers to.')
+
+    def count(self):
+        """Return the number of rows."""
+
+    def keyAt(self, index):
+        """Compute the key of the row at the index."""
+
+    def iterMany(self, number=None, chunksize=None):
+        """Iterate over the rows, optionally in chunks of rows."""
+
+
+class IDataset(zope.interface.Interface):
+    """A set of tables related by foreign keys."""
+
+    tables = zope.interface.Attribute(
+        'An ordered mapping of the table names to the tables.')
+
+    def addTable(self, name, fields=(), rows=None, **kw):
+        """Add a table with a number of rows or a parent table."""
+
+    def order(self):
+        """Return the tables in dependency order."""
+
+    def export(self, directory, format='csv', compression=None, **kw):
+        """Export all tables in dependency order into the directory."""
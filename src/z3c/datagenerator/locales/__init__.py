@@ -0,0 +1,171 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Locale Packs
+
+A locale pack is a directory of data files and a ``locale.json`` file of
+format rules. Packs are registered by name, either explicitly or by an entry
+point of the ``z3c.datagenerator.locales`` group referring to the package of
+the pack, and are only read when first used. All files are loaded through the
+shared data file cache.
+"""
+__docformat__ = "reStructuredText"
+import io
+import json
+import os
+import threading
+
+from z3c.datagenerator import data
+
+try:
+    from importlib import metadata
+except ImportError:
+    # Python 3.7
+    metadata = None
+    import pkg_resources
+
+# The entry point group of locale packs.
+ENTRY_POINTS = 'z3c.datagenerator.locales'
+# The file of the format rules of a pack.
+RULES_FILE = 'locale.json'
+
+_lock = threading.Lock()
+
+
+def readJSON(fullpath, encoding):
+    """Read a JSON file."""
+    with io.open(fullpath, 'r', encoding=encoding) as file:
+        return json.load(file)
+
+
+data.READERS['json'] = readJSON
+
+
+class Locale(object):
+    """A locale pack.
+
+    The rules map ``files`` to the names of the data files of the pack and
+    provide the format rules of the generators, like the ``phone`` template
+    and the ranges of its components.
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name)
+
+    @property
+    def rules(self):
+        """The format rules, read when first needed."""
+        return data.cache.load(
+            os.path.join(self.path, RULES_FILE), 'utf-8', 'json')
+
+    @property
+    def encoding(self):
+        """The encoding of the data files."""
+        return self.rules.get('encoding', 'latin-1')
+
+    def hasFile(self, name):
+        """Return whether the pack provides the data file."""
+        return name in self.rules.get('files', {})
+
+    def filename(self, name):
+        """Return the filename of a data file relative to the pack."""
+        try:
+            return self.rules['files'][name]
+        except KeyError:
+            raise ValueError(
+                'The locale %s has no %r data file.' % (self.name, name))
+
+    def rule(self, name, keys=()):
+        """Return the format rules of a generator, like ``phone``.
+
+        The rules must provide all ``keys``.
+        """
+        rules = self.rules.get(name)
+        if rules is None:
+            raise ValueError(
+                'The locale %s has no %r rules.' % (self.name, name))
+        for key in keys:
+            if key not in rules:
+                raise ValueError('The locale %s has no %r rule.' % (
+                    self.name, '%s.%s' % (name, key)))
+        return rules
+
+    def load(self, name, format='text'):
+        """Return the contents of a data file of the pack."""
+        return data.cache.load(
+            os.path.join(self.path, self.filename(name)), self.encoding,
+            format)
+
+
+LOCALES = {
+    'en_US': Locale('en_US', os.path.join(os.path.dirname(__file__), 'en_US')),
+    'de_DE': Locale('de_DE', os.path.join(os.path.dirname(__file__), 'de_DE')),
+    }
+
+_entryPointsLoaded = False
+
+
+def registerLocale(name, path):
+    """Register the locale pack in the directory under the name."""
+    locale = Locale(name, path)
+    with _lock:
+        LOCALES[name] = locale
+    return locale
+
+
+def _entryPoints():
+    if metadata is None:
+        return pkg_resources.iter_entry_points(ENTRY_POINTS)
+    entryPoints = metadata.entry_points()
+    if hasattr(entryPoints, 'select'):
+        return entryPoints.select(group=ENTRY_POINTS)
+    return entryPoints.get(ENTRY_POINTS, [])
+
+
+def loadEntryPoints():
+    """Register the locale packs of all entry points.
+
+    An entry point refers to the package containing the pack or to the path
+    of its directory. Explicitly registered packs take precedence.
+    """
+    global _entryPointsLoaded
+    for entryPoint in _entryPoints():
+        if entryPoint.name in LOCALES:
+            continue
+        target = entryPoint.load()
+        path = target
+        if not isinstance(target, str):
+            path = os.path.dirname(target.__file__)
+        with _lock:
+            LOCALES.setdefault(entryPoint.name, Locale(entryPoint.name, path))
+    _entryPointsLoaded = True
+
+
+def getLocale(locale):
+    """Return the locale pack of the name.
+
+    Packs registered by entry points are looked up the first time an unknown
+    name is requested. Locale objects are returned unchanged.
+    """
+    if isinstance(locale, Locale):
+        return locale
+    if locale not in LOCALES and not _entryPointsLoaded:
+        loadEntryPoints()
+    try:
+        return LOCALES[locale]
+    except KeyError:
+        raise ValueError('Unknown locale: %r' % locale)
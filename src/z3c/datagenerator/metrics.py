@@ -0,0 +1,194 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Generator Instrumentation
+
+When enabled, the ``get()`` and ``getMany()`` methods of all generator
+classes and the data file reader are replaced by wrappers counting calls,
+values, bytes and time. Disabling restores the original methods, so that
+there is no overhead at all while instrumentation is disabled.
+"""
+__docformat__ = "reStructuredText"
+import json
+import os
+import threading
+import time
+
+# All generator modules are imported, so that their classes are instrumented.
+from z3c.datagenerator import (
+    data, demographics, generator, net, parallel, record, text)
+
+# The instrumented generator methods.
+METHODS = ('get', 'getMany')
+
+_clock = getattr(time, 'perf_counter', time.time)
+_lock = threading.Lock()
+_local = threading.local()
+_patched = []
+_generators = {}
+_files = {}
+_callback = None
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        for nested in _subclasses(subclass):
+            yield nested
+
+
+def _name(cls):
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+
+def _record(mapping, name, key, count, seconds):
+    with _lock:
+        entry = mapping.get(name)
+        if entry is None:
+            entry = mapping[name] = {}
+        counters = entry.get(key)
+        if counters is None:
+            counters = entry[key] = {'calls': 0, 'values': 0, 'seconds': 0.0}
+        counters['calls'] += 1
+        counters['values'] += count
+        counters['seconds'] += seconds
+
+
+def _instrument(func, method):
+    def wrapper(self, *args, **kw):
+        # Calls of the same generator within a call, like ``get()`` calling
+        # ``getMany(1)``, are not counted again.
+        active = getattr(_local, 'active', None)
+        if active is None:
+            active = _local.active = set()
+        key = id(self)
+        if key in active:
+            return func(self, *args, **kw)
+        active.add(key)
+        start = _clock()
+        try:
+            result = func(self, *args, **kw)
+        finally:
+            active.discard(key)
+        seconds = _clock() - start
+        count = 1 if method == 'get' else len(result)
+        name = _name(self.__class__)
+        _record(_generators, name, method, count, seconds)
+        if _callback is not None:
+            _callback(method, name, count, seconds)
+        return result
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _instrumentReadCompiled(func):
+    def readCompiled(path, kind, encoding='latin-1'):
+        values = func(path, kind, encoding)
+        if values is not None:
+            _local.compiled = path + data.COMPILED_SUFFIX
+        return values
+    return readCompiled
+
+
+def _instrumentRead(func):
+    def read(fullpath, encoding, format):
+        _local.compiled = None
+        start = _clock()
+        values = func(fullpath, encoding, format)
+        seconds = _clock() - start
+        size = os.path.getsize(_local.compiled or fullpath)
+        _record(_files, fullpath, 'load', size, seconds)
+        if _callback is not None:
+            _callback('load', fullpath, size, seconds)
+        return values
+    return read
+
+
+def _patch(obj, name, value):
+    _patched.append((obj, name, obj.__dict__[name]))
+    setattr(obj, name, value)
+
+
+def isEnabled():
+    """Return whether the instrumentation is enabled."""
+    return bool(_patched)
+
+
+def enable(callback=None):
+    """Instrument all generator classes and the data file reader.
+
+    Only classes defined at this point are instrumented. If given,
+    ``callback`` is called after every instrumented call with the method
+    name (``get``, ``getMany`` or ``load``), the name of the generator class
+    or the path of the file, the amount of values or bytes and the time in
+    seconds.
+    """
+    global _callback
+    _callback = callback
+    if _patched:
+        return
+    classes = set()
+    for cls in _subclasses(generator.DataGenerator):
+        classes.update(cls.__mro__)
+    for cls in sorted(classes, key=_name):
+        for method in METHODS:
+            if method in cls.__dict__:
+                _patch(cls, method, _instrument(cls.__dict__[method], method))
+    _patch(data, 'readCompiled', _instrumentReadCompiled(data.readCompiled))
+    _patch(data, 'read', _instrumentRead(data.read))
+
+
+def disable():
+    """Restore the original methods; the metrics are kept."""
+    global _callback
+    _callback = None
+    while _patched:
+        obj, name, value = _patched.pop()
+        setattr(obj, name, value)
+
+
+def reset():
+    """Forget all metrics."""
+    with _lock:
+        _generators.clear()
+        _files.clear()
+
+
+def snapshot():
+    """Return a copy of the metrics.
+
+    ``generators`` maps the generator class names to the calls, values and
+    seconds of every method, and ``files`` maps the paths of the loaded
+    files to the loads, bytes and seconds. The time of a generator
+    includes the time of generators it calls, like the fields of a record.
+    """
+    with _lock:
+        return {
+            'generators': dict(
+                (name, dict((key, dict(counters))
+                            for key, counters in entry.items()))
+                for name, entry in _generators.items()),
+            'files': dict(
+                (name, {'loads': entry['load']['calls'],
+                        'bytes': entry['load']['values'],
+                        'seconds': entry['load']['seconds']})
+                for name, entry in _files.items()),
+            }
+
+
+def dumps(**kw):
+    """Return the metrics as JSON."""
+    kw.setdefault('sort_keys', True)
+    return json.dumps(snapshot(), **kw)
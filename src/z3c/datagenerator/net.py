@@ -13,84 +13,622 @@
 ##############################################################################
 """Demographics Data Generators"""
 __docformat__ = "reStructuredText"
+import binascii
+import bisect
+import ipaddress
 import os
-import random2 as random
+import re
+import socket
+import struct
 import zope.interface
 
-from z3c.datagenerator import demographics, generator, interfaces
+from z3c.datagenerator import data, demographics, generator, interfaces
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# The special-purpose networks, which are not used by public hosts.
+RESERVED_IPV4 = (
+    '0.0.0.0/8', '10.0.0.0/8', '100.64.0.0/10', '127.0.0.0/8',
+    '169.254.0.0/16', '172.16.0.0/12', '192.0.0.0/24', '192.0.2.0/24',
+    '192.88.99.0/24', '192.168.0.0/16', '198.18.0.0/15', '198.51.100.0/24',
+    '203.0.113.0/24', '224.0.0.0/4', '240.0.0.0/4')
+RESERVED_IPV6 = (
+    '::/127', '::ffff:0:0/96', '64:ff9b::/96', '100::/64', '2001::/23',
+    '2001:db8::/32', '2002::/16', 'fc00::/7', 'fe80::/10', 'ff00::/8')
+
+_IPV4 = struct.Struct('!I')
+_OCTETS = tuple(str(octet) for octet in range(256))
+# Random numbers provide 53 bits; larger integers are combined from several.
+_FLOAT_BITS = 53
+
+
+def randbelow(random, size):
+    """Draw an integer below ``size`` using the ``random()`` function.
+
+    Sizes up to 2**53 require a single random number.
+    """
+    if size <= 1 << _FLOAT_BITS:
+        return int(random() * size)
+    bits = size.bit_length()
+    while True:
+        value = 0
+        for shift in range(0, bits, 32):
+            value = (value << 32) | int(random() * 4294967296)
+        value >>= -bits % 32
+        if value < size:
+            return value
+
+
+class AddressSpace(object):
+    """The addresses of networks without the ones of excluded networks.
+
+    The addresses are numbered consecutively, so that an address is selected
+    by drawing a single index. If ``hosts`` is set, only the host addresses
+    of the networks, as listed by ``hosts()`` of the ``ipaddress`` module,
+    are included, that is without the network and broadcast addresses of
+    IPv4 networks and without the Subnet-Router anycast address of IPv6
+    networks.
+    """
+
+    def __init__(self, networks, exclude=(), version=4, hosts=False):
+        intervals = sorted(self._intervals(networks, version, hosts))
+        for low, high in sorted(self._intervals(exclude, version)):
+            remaining = []
+            for start, stop in intervals:
+                if stop < low or start > high:
+                    remaining.append((start, stop))
+                    continue
+                if start < low:
+                    remaining.append((start, low - 1))
+                if stop > high:
+                    remaining.append((high + 1, stop))
+            intervals = remaining
+        merged = []
+        for start, stop in intervals:
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+            else:
+                merged.append((start, stop))
+        self.starts = [start for start, stop in merged]
+        self.offsets = []
+        self.size = 0
+        for start, stop in merged:
+            self.offsets.append(self.size)
+            self.size += stop - start + 1
+        if not self.size:
+            raise ValueError('The networks do not contain any addresses.')
+
+    def _intervals(self, networks, version, hosts=False):
+        for network in networks:
+            network = ipaddress.ip_network(u'%s' % network)
+            if network.version != version:
+                raise ValueError(
+                    'Not an IPv%i network: %s' % (version, network))
+            low = int(network.network_address)
+            high = int(network.broadcast_address)
+            # Networks of one or two addresses consist of hosts only.
+            if hosts and network.max_prefixlen - network.prefixlen > 1:
+                low += 1
+                if version == 4:
+                    high -= 1
+            yield low, high
+
+    def __getitem__(self, idx):
+        pos = bisect.bisect_right(self.offsets, idx) - 1
+        return self.starts[pos] + idx - self.offsets[pos]
+
+
+class IPDataGenerator(generator.VectorizedMixin, generator.DataGenerator):
+    """Common functionality of IP address generators.
+
+    The addresses are selected from ``networks``, given in CIDR notation,
+    without the addresses of the ``exclude`` networks and, with
+    ``excludeReserved``, of all special-purpose networks. With ``hosts``
+    set, only host addresses are selected (see ``AddressSpace``). Each
+    address requires a single integer draw. If ``packed`` is set, the
+    addresses are produced as packed bytes in network byte order, for
+    example for binary columns like PostgreSQL's ``bytea``. Columns of type
+    ``inet`` need the text form instead.
+    """
+
+    version = None
+    networks = ()
+    reserved = ()
+    hosts = False
+    _space = None
+
+    def __init__(self, seed, networks=None, exclude=(),
+                 excludeReserved=False, packed=False, backend=None,
+                 hosts=False):
+        self.networks = tuple(networks or self.networks)
+        self.exclude = tuple(exclude)
+        self.excludeReserved = excludeReserved
+        self.packed = packed
+        self.backend = generator.checkBackend(backend)
+        self.hosts = hosts
+
+    @property
+    def space(self):
+        """The address space of the generator."""
+        if self._space is None:
+            exclude = self.exclude
+            if self.excludeReserved:
+                exclude += self.reserved
+            self._space = AddressSpace(
+                self.networks, exclude, self.version, self.hosts)
+        return self._space
+
+    def getIntegers(self, number, backend=None):
+        """Select ``number`` addresses as integers.
+
+        ``backend`` overrides the backend of the generator, of which only
+        the Python one is supported here.
+        """
+        rnd = self.random.random
+        space = self.space
+        size = space.size
+        if len(space.starts) == 1:
+            start = space.starts[0]
+            if size <= 1 << _FLOAT_BITS:
+                return [start + int(rnd() * size) for count in range(number)]
+            return [start + randbelow(rnd, size) for count in range(number)]
+        if size <= 1 << _FLOAT_BITS:
+            return [space[int(rnd() * size)] for count in range(number)]
+        return [space[randbelow(rnd, size)] for count in range(number)]
+
+    def get(self):
+        """Select an address."""
+        return self.getMany(1)[0]
+
+    def getMany(self, number):
+        """Select a set of addresses."""
+        return self.format(self.getIntegers(number))
+
+    def format(self, values):
+        """Format the integers as addresses or packed addresses."""
+        raise NotImplementedError
 
 
 @zope.interface.implementer(interfaces.IDataGenerator)
-class IPv4DataGenerator(object):
-    """IPv4 generator."""
+class IPv4DataGenerator(IPDataGenerator):
+    """IPv4 generator.
+
+    Without any networks, exclusions and reserved ranges, the four octets
+    are drawn individually, like in all earlier releases, of which
+    ``padded`` reproduces the zero-padded format.
+    """
+
+    version = 4
+    networks = ('0.0.0.0/0',)
+    reserved = RESERVED_IPV4
+    padded = False
+
+    def __init__(self, seed, networks=None, exclude=(),
+                 excludeReserved=False, packed=False, padded=False,
+                 backend=None, hosts=False):
+        self._initRandom(seed+'ip')
+        super(IPv4DataGenerator, self).__init__(
+            seed, networks, exclude, excludeReserved, packed, backend, hosts)
+        self.padded = padded
+        self._legacy = not (networks or exclude or excludeReserved or hosts)
 
-    def __init__(self, seed):
-        self.random = random.Random(generator.consistent_hash(seed+'ip'))
+    def getIntegers(self, number, backend=None):
+        """Select ``number`` addresses as integers.
+
+        ``backend`` overrides the backend of the generator.
+        """
+        useNumPy = self._useNumPy(backend)
+        if not self._legacy:
+            if useNumPy:
+                return self._getIntegersNumPy(number).tolist()
+            return super(IPv4DataGenerator, self).getIntegers(number)
+        if useNumPy:
+            values = self._drawIntegers(
+                number, [1, 0, 0, 0], [255, 255, 255, 255])
+            return ((values[:, 0] << 24) | (values[:, 1] << 16) |
+                    (values[:, 2] << 8) | values[:, 3]).tolist()
+        rnd = self.random.random
+        return [((1 + int(rnd() * 255)) << 24) | (int(rnd() * 256) << 16) |
+                (int(rnd() * 256) << 8) | int(rnd() * 256)
+                for count in range(number)]
+
+    def _getIntegersNumPy(self, number):
+        space = self.space
+        indexes = (self.numpyRandom.random(number) * space.size).astype(
+            numpy.int64)
+        offsets = numpy.array(space.offsets, dtype=numpy.int64)
+        starts = numpy.array(space.starts, dtype=numpy.int64)
+        pos = numpy.searchsorted(offsets, indexes, 'right') - 1
+        return starts[pos] + indexes - offsets[pos]
 
     def get(self):
-        """Select a value from the values list and return it."""
-        return '%.3i.%.3i.%.3i.%.3i' %(
-            self.random.randint(1, 255), self.random.randint(0, 255),
-            self.random.randint(0, 255), self.random.randint(0, 255))
+        """Select an address.
+
+        Single addresses are always computed by the Python backend.
+        """
+        return self.format(self.getIntegers(1, generator.PYTHON))[0]
+
+    def format(self, values):
+        """Format the integers as addresses or packed addresses."""
+        if self.packed:
+            pack = _IPV4.pack
+            return [pack(value) for value in values]
+        if self.padded:
+            return ['%.3i.%.3i.%.3i.%.3i' % (
+                        value >> 24, value >> 16 & 255, value >> 8 & 255,
+                        value & 255)
+                    for value in values]
+        octets = _OCTETS
+        return ['.'.join((octets[value >> 24], octets[value >> 16 & 255],
+                          octets[value >> 8 & 255], octets[value & 255]))
+                for value in values]
+
+
+@zope.interface.implementer(interfaces.IDataGenerator)
+class IPv6DataGenerator(IPDataGenerator):
+    """IPv6 generator.
+
+    By default, addresses are selected from the global unicast range.
+    Addresses are formatted in their compressed form.
+    """
+
+    version = 6
+    networks = ('2000::/3',)
+    reserved = RESERVED_IPV6
+
+    def __init__(self, seed, networks=None, exclude=(),
+                 excludeReserved=False, packed=False, hosts=False):
+        self._initRandom(seed+'ipv6')
+        super(IPv6DataGenerator, self).__init__(
+            seed, networks, exclude, excludeReserved, packed, hosts=hosts)
+
+    def format(self, values):
+        """Format the integers as addresses or packed addresses."""
+        packed = [binascii.unhexlify('%032x' % value) for value in values]
+        if self.packed:
+            return packed
+        ntop = socket.inet_ntop
+        family = socket.AF_INET6
+        return [ntop(family, value) for value in packed]
+
+
+@zope.interface.implementer(interfaces.IDataGenerator)
+class MACDataGenerator(generator.DataGenerator):
+    """MAC address generator.
+
+    The addresses are unicast addresses, optionally with a fixed
+    organizationally unique identifier (``oui``), like ``'00:1a:2b'``.
+    """
+
+    separator = ':'
+    oui = None
+    packed = False
+
+    def __init__(self, seed, oui=None, separator=':', packed=False):
+        self._initRandom(seed+'mac')
+        if oui is not None:
+            oui = int(oui.replace(':', '').replace('-', ''), 16)
+        self.oui = oui
+        self.separator = separator
+        self.packed = packed
+
+    def getIntegers(self, number):
+        """Select ``number`` addresses as integers."""
+        rnd = self.random.random
+        if self.oui is not None:
+            prefix = self.oui << 24
+            return [prefix | int(rnd() * 16777216) for count in range(number)]
+        mask = ~(1 << 40)
+        return [int(rnd() * 281474976710656) & mask
+                for count in range(number)]
+
+    def get(self):
+        """Select an address."""
+        return self.getMany(1)[0]
 
     def getMany(self, number):
-        """Select a set of values from the values list and return them."""
-        return [self.get() for count in range(number)]
+        """Select a set of addresses."""
+        values = ['%012x' % value for value in self.getIntegers(number)]
+        if self.packed:
+            return [binascii.unhexlify(value) for value in values]
+        join = self.separator.join
+        return [join((value[:2], value[2:4], value[4:6], value[6:8],
+                      value[8:10], value[10:]))
+                for value in values]
+
+
+@zope.interface.implementer(interfaces.IDataGenerator)
+class URLDataGenerator(generator.DataGenerator):
+    """URL generator.
+
+    URLs consist of a domain built from the word list and a generic or,
+    with a likelihood of ``countryRatio``, a country code top-level domain,
+    followed by a path of up to ``maxDepth`` words.
+    """
+
+    wordsFile = 'words.txt'
+    genericFile = 'gTLD.csv'
+    countryFile = 'ccTLD.csv'
+    path = os.path.dirname(__file__)
+    encoding = 'latin-1'
+
+    schemes = ('https', 'http')
+    countryRatio = 0.3
+    maxDepth = 3
+
+    words = data.cachedFile('words', 'wordsFile')
+    genericTLDs = data.cachedFile('genericTLDs', 'genericFile', 'csv')
+    countryTLDs = data.cachedFile('countryTLDs', 'countryFile', 'csv')
+
+    def __init__(self, seed, schemes=None, countryRatio=None, maxDepth=None):
+        self._initRandom(seed+'url')
+        self.schemes = tuple(schemes or self.schemes)
+        if countryRatio is not None:
+            self.countryRatio = countryRatio
+        if maxDepth is not None:
+            self.maxDepth = maxDepth
+
+    def get(self):
+        """Compute a URL."""
+        return self.getMany(1)[0]
+
+    def getMany(self, number):
+        """Compute a set of URLs."""
+        rnd = self.random.random
+        words, nwords = self.words, len(self.words)
+        generic, ngeneric = self.genericTLDs, len(self.genericTLDs)
+        country, ncountry = self.countryTLDs, len(self.countryTLDs)
+        schemes, nschemes = self.schemes, len(self.schemes)
+        ratio = self.countryRatio
+        depths = self.maxDepth + 1
+        result = []
+        append = result.append
+        for count in range(number):
+            scheme = schemes[int(rnd() * nschemes)]
+            domain = words[int(rnd() * nwords)]
+            if rnd() < ratio:
+                tld = country[int(rnd() * ncountry)][0]
+            else:
+                tld = generic[int(rnd() * ngeneric)][0]
+            path = '/'.join([words[int(rnd() * nwords)]
+                             for depth in range(int(rnd() * depths))])
+            append(u'%s://%s%s/%s' % (scheme, domain, tld, path))
+        return result
+
+
+_PLACEHOLDER = re.compile(r'%%|%\((\w+)\)')
+
+
+class Template(object):
+    """A ``%(name)s`` pattern compiled to a positional format string.
+
+    ``names`` lists the referenced placeholders in the order of their
+    values, so that only these values need to be computed.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.names = []
+        self.format = _PLACEHOLDER.sub(self._replace, pattern)
+
+    def _replace(self, match):
+        name = match.group(1)
+        if name is None:
+            return match.group(0)
+        self.names.append(name)
+        return '%'
+
+    def compile(self, placeholders):
+        """Return a function formatting the values of the placeholders.
+
+        ``placeholders`` maps the names to functions computing the value of
+        the placeholder from the arguments of the returned function.
+        """
+        unknown = [name for name in self.names if name not in placeholders]
+        if unknown:
+            raise ValueError('Unknown placeholder(s): %s' % ', '.join(unknown))
+        format = self.format
+        getters = [placeholders[name] for name in self.names]
+        if len(getters) == 2:
+            first, second = getters
+            return lambda *args: format % (first(*args), second(*args))
+        return lambda *args: format % tuple(
+            [getter(*args) for getter in getters])
+
+
+def normalize(name):
+    """Lowercase the name and remove all but letters and digits."""
+    return u''.join(c for c in name.lower() if c.isalnum())
+
+
+def normalizedNames(names):
+    """Map all values of a name generator to their normalized form.
+
+    The mapping is computed once per data file and shared.
+    """
+    values = names.values
+    return data.cache.derive(
+        os.path.join(names.path, names.filename),
+        ('normalized', names.weights is True),
+        lambda contents: dict((value, normalize(value)) for value in values),
+        names.encoding, names.cacheFormat)
 
 
 @zope.interface.implementer(interfaces.IDataGenerator)
-class UsernameDataGenerator(object):
-    """Username generator."""
+class UsernameDataGenerator(generator.DataGenerator):
+    """Username generator.
+
+    The pattern references the placeholders ``firstName``, ``lastName``,
+    ``firstInitial``, ``lastInitial`` and ``number``, and the ones given by
+    ``placeholders``, which maps names to functions computing the value from
+    the first name, the last name and the random number generator. Only
+    the referenced placeholders are computed.
+
+    In unique mode, repeated usernames are disambiguated by appending a
+    counter. If a username ends with a digit, the counter is separated by an
+    underscore. A counter per distinct username is remembered, so that the
+    memory grows with the number of distinct usernames, which approaches the
+    number of values for patterns like ``%(firstName)s%(number)s``. Use
+    ``IdDataGenerator(unique=True)`` for keys whose memory is bounded. Since
+    the values depend on all values before them, the counter-based stream is
+    not available in unique mode.
+    """
 
     pattern = u'%(firstInitial)s%(lastName)s'
+    placeholders = None
+    _nested = ('firstNames', 'lastNames')
+    _compiled = None
 
-    def __init__(self, seed, pattern=None):
-        self.random = random.Random(generator.consistent_hash(seed+'username'))
+    def __init__(self, seed, pattern=None, unique=False, placeholders=None):
+        self._initRandom(seed+'username')
         self.firstNames = demographics.FirstNameGenerator(seed)
         self.lastNames = demographics.LastNameGenerator(seed)
         if pattern:
             self.pattern = pattern
+        self.unique = unique
+        self.placeholders = placeholders
+        self._counts = {}
+
+    def _placeholders(self):
+        firstNames = normalizedNames(self.firstNames).get
+        lastNames = normalizedNames(self.lastNames).get
+        placeholders = {
+            'firstName': lambda fname, lname:
+                firstNames(fname) or normalize(fname),
+            'lastName': lambda fname, lname:
+                lastNames(lname) or normalize(lname),
+            'firstInitial': lambda fname, lname: fname[0].lower(),
+            'lastInitial': lambda fname, lname: lname[0].lower(),
+            'number': lambda fname, lname: self.random.randint(1, 100),
+            }
+        for name, func in (self.placeholders or {}).items():
+            placeholders[name] = (lambda func: lambda fname, lname:
+                                  func(fname, lname, self.random))(func)
+        return placeholders
+
+    def _compile(self):
+        compiled = self._compiled
+        if compiled is None or compiled[0] is not self.pattern:
+            compiled = self._compiled = (
+                self.pattern,
+                Template(self.pattern).compile(self._placeholders()))
+        return compiled
 
     def get(self, firstName=None, lastName=None):
         """Select a value from the values list and return it."""
         fname = firstName or self.firstNames.get()
         lname = lastName or self.lastNames.get()
-        return self.pattern % {
-            'firstName':     ''.join(c for c in fname.lower() if c.isalnum()),
-            'lastName':      ''.join(c for c in lname.lower() if c.isalnum()),
-            'firstInitial':  fname[0].lower(),
-            'lastInitial':   lname[0].lower(),
-            'number':        self.random.randint(1, 100)}
+        username = self._compile()[1](fname, lname)
+        if self.unique:
+            return self._disambiguate(username)
+        return username
+
+    def _disambiguate(self, username):
+        count = self._counts.get(username, 0) + 1
+        self._counts[username] = count
+        if count == 1:
+            return username
+        if username[-1:].isdigit():
+            return u'%s_%i' % (username, count)
+        return u'%s%i' % (username, count)
+
+    def getRange(self, start, stop):
+        if self.unique:
+            raise ValueError(
+                'Unique usernames are not available by index.')
+        return super(UsernameDataGenerator, self).getRange(start, stop)
 
     def getMany(self, number):
         """Select a set of values from the values list and return them."""
-        return [self.get() for count in range(number)]
+        firstNames = self.firstNames.getMany(number, replace=True)
+        lastNames = self.lastNames.getMany(number, replace=True)
+        format = self._compile()[1]
+        usernames = [format(fname, lname)
+                     for fname, lname in zip(firstNames, lastNames)]
+        if self.unique:
+            return [self._disambiguate(username) for username in usernames]
+        return usernames
 
 
 @zope.interface.implementer(interfaces.IDataGenerator)
-class EMailDataGenerator(object):
-    """E-Mail generator."""
+class EMailDataGenerator(generator.DataGenerator):
+    """E-Mail generator.
+
+    The pattern references the placeholders ``uname``, ``domain`` and
+    ``tld``, and the ones given by ``placeholders``, which maps names to
+    functions computing the value from the username and the random number
+    generator. Only the referenced placeholders are computed.
+
+    In unique mode, the generated usernames are unique, so that all
+    generated E-mail addresses are distinct. As for usernames, the
+    counter-based stream is not available in unique mode.
+    """
 
     wordsFile = 'words.txt'
     tldsFile = 'gTLD.csv'
 
     pattern = '%(uname)s@%(domain)s%(tld)s'
+    placeholders = None
+    _nested = ('usernames', 'words', 'tlds')
+    _compiled = None
 
-    def __init__(self, seed):
-        self.random = random.Random(generator.consistent_hash(seed+'enail'))
-        self.usernames = UsernameDataGenerator(seed)
+    def __init__(self, seed, unique=False, pattern=None, placeholders=None):
+        self._initRandom(seed+'enail')
+        self.usernames = UsernameDataGenerator(seed, unique=unique)
         self.words = generator.TextDataGenerator(seed, self.wordsFile)
         self.tlds = generator.CSVDataGenerator(seed, self.tldsFile)
+        if pattern:
+            self.pattern = pattern
+        self.placeholders = placeholders
+
+    def _placeholders(self):
+        # The domain and TLD are drawn in bulk by ``getMany()`` and passed
+        # along with the username.
+        placeholders = {
+            'uname': lambda uname, domain, tld: uname,
+            'domain': lambda uname, domain, tld: domain,
+            'tld': lambda uname, domain, tld: tld,
+            }
+        for name, func in (self.placeholders or {}).items():
+            placeholders[name] = (lambda func: lambda uname, domain, tld:
+                                  func(uname, self.random))(func)
+        return placeholders
 
+    def _compile(self):
+        compiled = self._compiled
+        if compiled is None or compiled[0] is not self.pattern:
+            template = Template(self.pattern)
+            compiled = self._compiled = (
+                self.pattern,
+                template.compile(self._placeholders()),
+                'domain' in template.names, 'tld' in template.names)
+        return compiled
 
     def get(self, username=None):
         """Select a value from the values list and return it."""
-        return self.pattern %{
-            'uname': username or self.usernames.get(),
-            'domain': self.words.get(),
-            'tld': self.tlds.get()[0]}
+        pattern, format, domain, tld = self._compile()
+        return format(
+            username or self.usernames.get(),
+            self.words.get() if domain else None,
+            self.tlds.get()[0] if tld else None)
 
+    def getRange(self, start, stop):
+        if self.usernames.unique:
+            raise ValueError(
+                'Unique E-mail addresses are not available by index.')
+        return super(EMailDataGenerator, self).getRange(start, stop)
 
     def getMany(self, number):
         """Select a set of values from the values list and return them."""
-        return [self.get() for count in range(number)]
+        pattern, format, domain, tld = self._compile()
+        usernames = self.usernames.getMany(number)
+        domains = self.words.getMany(number, replace=True) if domain \
+            else [None] * number
+        tlds = [row[0] for row in self.tlds.getMany(number, replace=True)] \
+            if tld else [None] * number
+        return [format(uname, domain, tld)
+                for uname, domain, tld in zip(usernames, domains, tlds)]
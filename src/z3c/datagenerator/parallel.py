@@ -0,0 +1,172 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Parallel Data Generation
+
+The values are split into shards of a fixed size. Every shard is computed by
+its own generator, which is seeded using the parent seed and the index of
+the shard. Since the shards do not depend on the amount of workers, the
+output is identical for any amount of workers.
+"""
+__docformat__ = "reStructuredText"
+import collections
+import itertools
+import multiprocessing
+
+from z3c.datagenerator import generator
+
+# The default amount of values computed by a single generator.
+SHARDSIZE = 100000
+# The amount of shards per worker computed ahead of the consumer.
+WINDOW = 2
+
+
+def shard_seed(seed, index):
+    """Derive the seed of a shard from the parent seed."""
+    return '%s:shard%i' % (seed, index)
+
+
+def _generateShard(task):
+    factory, seed, number = task
+    return generator.getMany(factory(seed), number)
+
+
+def _imapShards(tasks, workers, count=None):
+    """Compute the shards of the tasks in order.
+
+    At most ``WINDOW`` shards per worker are computed ahead of the consumer,
+    so that a slow consumer does not make computed shards pile up.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if count is not None:
+        workers = min(workers, count)
+    if workers <= 1:
+        for task in tasks:
+            yield _generateShard(task)
+        return
+    tasks = iter(tasks)
+    pool = multiprocessing.Pool(workers)
+    try:
+        pending = collections.deque(
+            pool.apply_async(_generateShard, (task,))
+            for task in itertools.islice(tasks, workers * WINDOW))
+        while pending:
+            shard = pending.popleft().get()
+            for task in itertools.islice(tasks, 1):
+                pending.append(pool.apply_async(_generateShard, (task,)))
+            yield shard
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def iterate_parallel(generator_factory, number, seed, workers=None,
+                     shardsize=SHARDSIZE):
+    """Iterate over the shards of values computed by a pool of processes.
+
+    ``generator_factory`` is called with the seed of each shard and must be
+    picklable, for example a generator class or a ``functools.partial``.
+    The shards are produced in order as lists of values.
+    """
+    tasks = [(generator_factory, shard_seed(seed, index),
+              min(shardsize, number - start))
+             for index, start in enumerate(range(0, number, shardsize))]
+    return _imapShards(tasks, workers, len(tasks))
+
+
+def generate_parallel(generator_factory, number, seed, workers=None,
+                      shardsize=SHARDSIZE):
+    """Compute ``number`` values using a pool of processes.
+
+    The values are identical for any amount of workers.
+    """
+    values = []
+    for shard in iterate_parallel(
+            generator_factory, number, seed, workers, shardsize):
+        values.extend(shard)
+    return values
+
+
+class ParallelDataGenerator(object):
+    """A generator computing the values of another one in parallel.
+
+    The values are the ones of the shards in order, and successive calls
+    continue where the previous one stopped. A shard, of which only the
+    first values were requested, is completed by its generator in the
+    current process. When iterating in chunks, the shards are produced as
+    chunks.
+    """
+
+    def __init__(self, generator_factory, seed, workers=None,
+                 shardsize=SHARDSIZE):
+        self.factory = generator_factory
+        self.seed = seed
+        self.workers = workers
+        self.shardsize = shardsize
+        self.names = getattr(generator_factory(seed), 'names', None)
+        # The index of the next shard to start.
+        self._next = 0
+        # The generator of a partially consumed shard and its remaining size.
+        self._current = None
+
+    def _shards(self, number=None):
+        # Iterate over the shards of the next ``number`` values, or of all
+        # values, advancing the cursor as the shards are consumed.
+        if self._current is not None and number != 0:
+            gen, remaining = self._current
+            size = remaining if number is None else min(remaining, number)
+            values = generator.getMany(gen, size)
+            remaining -= size
+            self._current = (gen, remaining) if remaining else None
+            if number is not None:
+                number -= size
+            yield values
+        if number is None:
+            count = None
+            indexes = itertools.count(self._next)
+        else:
+            count = number // self.shardsize
+            indexes = range(self._next, self._next + count)
+        tasks = ((self.factory, shard_seed(self.seed, index), self.shardsize)
+                 for index in indexes)
+        for shard in _imapShards(tasks, self.workers, count):
+            self._next += 1
+            yield shard
+        remainder = number % self.shardsize if number else 0
+        if remainder:
+            gen = self.factory(shard_seed(self.seed, self._next))
+            self._next += 1
+            self._current = (gen, self.shardsize - remainder)
+            yield generator.getMany(gen, remainder)
+
+    def get(self):
+        """Compute the next value."""
+        return self.getMany(1)[0]
+
+    def getMany(self, number):
+        """Compute the next set of values in parallel."""
+        return [value for shard in self._shards(number) for value in shard]
+
+    def iterMany(self, number=None, chunksize=None):
+        """Iterate over the next values, optionally shard by shard.
+
+        Without ``number``, the iteration is infinite.
+        """
+        shards = self._shards(number)
+        if chunksize:
+            return shards
+        return (value for shard in shards for value in shard)
+
+    def __iter__(self):
+        return self.iterMany()
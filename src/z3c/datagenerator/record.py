@@ -0,0 +1,135 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Record Data Generators"""
+__docformat__ = "reStructuredText"
+import collections
+import zope.interface
+
+from z3c.datagenerator import demographics, generator, interfaces, net, text
+
+# The known fields: name -> (generator factory, names of the fields passed
+# to the generator's ``get()`` method).
+FIELDS = {
+    'firstName': (demographics.FirstNameGenerator, ()),
+    'lastName': (demographics.LastNameGenerator, ()),
+    'ssn': (demographics.SSNDataGenerator, ()),
+    'address': (demographics.AddressDataGenerator, ()),
+    'phone': (demographics.PhoneDataGenerator, ()),
+    'ip': (net.IPv4DataGenerator, ()),
+    'ipv6': (net.IPv6DataGenerator, ()),
+    'mac': (net.MACDataGenerator, ()),
+    'url': (net.URLDataGenerator, ()),
+    'username': (net.UsernameDataGenerator, ('firstName', 'lastName')),
+    'email': (net.EMailDataGenerator, ('username',)),
+    'date': (generator.DateDataGenerator, ()),
+    'id': (generator.IdDataGenerator, ()),
+    'text': (text.TextGenerator, ()),
+    }
+
+PERSON_FIELDS = (
+    'firstName', 'lastName', 'ssn', 'address', 'phone', 'username', 'email')
+
+# The known fields using the data and formats of a locale pack.
+LOCALIZED_FIELDS = ('firstName', 'lastName', 'ssn', 'address', 'phone')
+
+
+@zope.interface.implementer(interfaces.IRecordGenerator)
+class RecordGenerator(generator.DataGenerator):
+    """A generator of records combining several fields.
+
+    The schema is a sequence of fields. Each field is either the name of a
+    known field or a ``(name, generator[, depends])`` tuple, where
+    ``generator`` is a data generator or a factory called with the seed.
+    ``depends`` lists the fields passed to the generator's ``get()`` method.
+
+    Fields that are required by others, but not part of the schema, are
+    computed without being included in the records.
+
+    With a ``locale``, the known fields of ``LOCALIZED_FIELDS`` use the
+    locale pack.
+    """
+
+    locale = None
+
+    def __init__(self, seed, fields=PERSON_FIELDS, rowFactory=None,
+                 locale=None):
+        self.locale = locale
+        self.names = []
+        self.fields = []
+        specs = dict((self._name(spec), spec) for spec in fields)
+        for spec in fields:
+            self.names.append(self._name(spec))
+            self._addField(seed, spec, specs)
+        if rowFactory is None:
+            rowFactory = collections.namedtuple('Record', self.names)._make
+        self.rowFactory = rowFactory
+        positions = dict(
+            (field[0], idx) for idx, field in enumerate(self.fields))
+        self._positions = [positions[name] for name in self.names]
+
+    def _name(self, spec):
+        return spec if not isinstance(spec, tuple) else spec[0]
+
+    def _addField(self, seed, spec, specs):
+        name = self._name(spec)
+        if name in [field[0] for field in self.fields]:
+            return
+        if isinstance(spec, tuple):
+            gen, depends = spec[1], spec[2] if len(spec) > 2 else ()
+        elif name in FIELDS:
+            gen, depends = FIELDS[name]
+        else:
+            raise ValueError('Unknown field: %r' % name)
+        if not interfaces.IDataGenerator.providedBy(gen):
+            if self.locale is not None and not isinstance(spec, tuple) \
+                    and name in LOCALIZED_FIELDS:
+                gen = gen(seed, locale=self.locale)
+            else:
+                gen = gen(seed)
+        for dependency in depends:
+            self._addField(seed, specs.get(dependency, dependency), specs)
+        positions = [field[0] for field in self.fields]
+        self.fields.append(
+            (name, gen, [positions.index(dep) for dep in depends]))
+
+    def _generators(self):
+        # Records do not draw any random numbers themselves.
+        for name, gen, depends in self.fields:
+            for nested in gen._generators():
+                yield nested
+
+    def get(self):
+        """Compute a record."""
+        values = []
+        for name, gen, depends in self.fields:
+            if depends:
+                values.append(gen.get(*[values[idx] for idx in depends]))
+            else:
+                values.append(gen.get())
+        return self.rowFactory([values[idx] for idx in self._positions])
+
+    def getMany(self, number):
+        """Compute a set of records."""
+        columns = []
+        for name, gen, depends in self.fields:
+            if depends:
+                get = gen.get
+                columns.append(
+                    [get(*args) for args in
+                     zip(*[columns[idx] for idx in depends])])
+            else:
+                columns.append(generator.getMany(gen, number))
+        rowFactory = self.rowFactory
+        return [rowFactory(row)
+                for row in zip(*[columns[idx] for idx in self._positions])]
@@ -14,7 +14,6 @@
 """Test Setup"""
 import doctest
 import re
-import sys
 import unittest
 from zope.testing import renormalizing
 
@@ -25,14 +24,48 @@ checker = renormalizing.RENormalizing([
     ])
 
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import zstandard
+except ImportError:
+    pyarrow = zstandard = None
+
+
+# The doctest files; ``vectorized.rst`` is only run if NumPy is installed
+# and ``parquet.rst`` if `pyarrow` and `zstandard` are.
+DOCFILES = (
+    'README.rst',
+    'record.rst',
+    'parallel.rst',
+    'export.rst',
+    'cli.rst',
+    'text.rst',
+    'dataset.rst',
+    'metrics.rst',
+    'locales.rst',
+    'aio.rst',
+    'benchmark.rst',
+    )
+
+
 def test_suite():
-    return unittest.TestSuite((
+    docfiles = DOCFILES
+    if numpy is not None:
+        docfiles += ('vectorized.rst',)
+    if pyarrow is not None:
+        docfiles += ('parquet.rst',)
+    return unittest.TestSuite([
         doctest.DocFileSuite(
-                'README.rst',
+                filename,
                 checker=checker,
                 optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS,
-                ),
-        ))
+                )
+        for filename in docfiles])
 
 if __name__ == '__main__':
     unittest.main(defaultTest='test_suite')
@@ -0,0 +1,219 @@
+##############################################################################
+#
+# Copyright (c) 2007 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Free Text Data Generators
+
+Texts are assembled from UTF-8 encoded words, which are encoded once per
+word list and shared by all generators, so that a text is built by joining
+byte fragments and decoded only once.
+"""
+__docformat__ = "reStructuredText"
+import os
+import zope.interface
+
+from z3c.datagenerator import data, generator, interfaces
+
+UNITS = ('word', 'sentence', 'paragraph', 'document')
+TERMINATORS = (b'.', b'!', b'?')
+
+
+def _fragments(words):
+    return (tuple(word.encode('utf-8') for word in words),
+            tuple(word.capitalize().encode('utf-8') for word in words))
+
+
+def buildChain(text):
+    """Build a first order Markov chain of the words of a corpus.
+
+    Returns a tuple of the UTF-8 encoded words, the indexes of all words
+    starting a sentence and, for every word, the indexes of all words
+    following it. Since successors are repeated, they are selected with
+    their frequency in the corpus.
+    """
+    tokens = text.split()
+    indexes = {}
+    words = []
+    for token in tokens:
+        if token not in indexes:
+            indexes[token] = len(words)
+            words.append(token.encode('utf-8'))
+    successors = [[] for word in words]
+    starts = []
+    previous = None
+    for token in tokens:
+        idx = indexes[token]
+        if previous is None or words[previous].endswith(TERMINATORS):
+            starts.append(idx)
+        else:
+            successors[previous].append(idx)
+        previous = idx
+    if not starts:
+        raise ValueError('The corpus does not contain any words.')
+    return (tuple(words), tuple(starts),
+            tuple(tuple(following) for following in successors))
+
+
+def _readChain(fullpath, encoding):
+    with open(fullpath, 'rb') as file:
+        return buildChain(file.read().decode(encoding))
+
+
+data.READERS['chain'] = _readChain
+
+
+@zope.interface.implementer(interfaces.ITextGenerator)
+class TextGenerator(generator.DataGenerator):
+    """A free text generator.
+
+    The values are words, sentences, paragraphs or documents, depending on
+    the ``unit``. The lengths of sentences in words, paragraphs in sentences
+    and documents in paragraphs are ``(low, high)`` tuples of uniformly
+    distributed lengths, or callables computing a length from the
+    ``random()`` function.
+
+    Without a ``corpus``, sentences consist of random words of the word
+    list. With a corpus file, sentences are produced by a Markov chain of
+    the corpus, which is computed once per file. Then the sentence length is
+    the maximum number of words of a sentence.
+    """
+
+    wordsFile = 'words.txt'
+    path = os.path.dirname(__file__)
+    encoding = 'latin-1'
+
+    unit = 'sentence'
+    sentenceLength = (4, 16)
+    paragraphLength = (3, 7)
+    documentLength = (2, 6)
+    corpus = None
+    _fragments = None
+    _chain = None
+
+    words = data.cachedFile('words', 'wordsFile')
+
+    def __init__(self, seed, unit='sentence', sentenceLength=None,
+                 paragraphLength=None, documentLength=None, corpus=None):
+        if unit not in UNITS:
+            raise ValueError('Unknown unit: %r' % unit)
+        self._initRandom(seed+'text')
+        self.unit = unit
+        self.sentenceLength = sentenceLength or self.sentenceLength
+        self.paragraphLength = paragraphLength or self.paragraphLength
+        self.documentLength = documentLength or self.documentLength
+        self.corpus = corpus
+
+    @property
+    def fragments(self):
+        """The encoded words and capitalized words."""
+        if self._fragments is None:
+            self._fragments = data.cache.derive(
+                os.path.join(self.path, self.wordsFile), 'fragments',
+                _fragments, self.encoding)
+        return self._fragments
+
+    @property
+    def chain(self):
+        """The Markov chain of the corpus or ``None``."""
+        if self._chain is None and self.corpus is not None:
+            self._chain = data.cache.load(
+                os.path.join(self.path, self.corpus), self.encoding, 'chain')
+        return self._chain
+
+    def _length(self, spec, rnd):
+        if callable(spec):
+            return spec(rnd)
+        low, high = spec
+        return low + int(rnd() * (high - low + 1))
+
+    def _sentence(self, rnd):
+        length = self._length(self.sentenceLength, rnd)
+        chain = self.chain
+        if chain is not None:
+            return self._chainSentence(chain, length, rnd)
+        words, capitalized = self.fragments
+        size = len(words)
+        parts = [capitalized[int(rnd() * size)]]
+        parts.extend([words[int(rnd() * size)]
+                      for count in range(length - 1)])
+        return b' '.join(parts) + b'.'
+
+    def _chainSentence(self, chain, length, rnd):
+        words, starts, successors = chain
+        idx = starts[int(rnd() * len(starts))]
+        parts = [words[idx]]
+        while len(parts) < length and not parts[-1].endswith(TERMINATORS):
+            following = successors[idx]
+            if not following:
+                break
+            idx = following[int(rnd() * len(following))]
+            parts.append(words[idx])
+        sentence = b' '.join(parts)
+        if not sentence.endswith(TERMINATORS):
+            sentence += b'.'
+        return sentence
+
+    def _paragraph(self, rnd):
+        return b' '.join([self._sentence(rnd) for count in range(
+            self._length(self.paragraphLength, rnd))])
+
+    def _document(self, rnd):
+        return b'\n\n'.join([self._paragraph(rnd) for count in range(
+            self._length(self.documentLength, rnd))])
+
+    def _unit(self, unit, rnd):
+        if unit == 'word':
+            words = self.fragments[0]
+            return words[int(rnd() * len(words))]
+        return getattr(self, '_' + unit)(rnd)
+
+    def getWord(self):
+        """Select a word."""
+        return self._unit('word', self.random.random).decode('utf-8')
+
+    def getSentence(self):
+        """Compute a sentence."""
+        return self._sentence(self.random.random).decode('utf-8')
+
+    def getParagraph(self):
+        """Compute a paragraph of sentences."""
+        return self._paragraph(self.random.random).decode('utf-8')
+
+    def getDocument(self):
+        """Compute a document of paragraphs."""
+        return self._document(self.random.random).decode('utf-8')
+
+    def get(self):
+        """Compute a text of the generator's unit."""
+        return self._unit(self.unit, self.random.random).decode('utf-8')
+
+    def getMany(self, number):
+        """Compute a set of texts of the generator's unit."""
+        rnd = self.random.random
+        unit = self.unit
+        return [self._unit(unit, rnd).decode('utf-8')
+                for count in range(number)]
+
+    def getBytes(self, size):
+        """Compute ``size`` bytes of UTF-8 encoded paragraphs.
+
+        The paragraphs are separated by empty lines. The last paragraph is
+        cut off at the requested size.
+        """
+        rnd = self.random.random
+        parts = []
+        length = 0
+        while length < size:
+            paragraph = self._paragraph(rnd)
+            parts.append(paragraph)
+            length += len(paragraph) + 2
+        return b'\n\n'.join(parts)[:size]